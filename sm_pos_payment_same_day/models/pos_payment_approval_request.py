@@ -19,20 +19,21 @@ class PosPaymentApprovalRequest(models.Model):
         3. Si excede → AGREGAR con advertencia
         """
         for record in self:
-            _logger.info("=" * 80)
-            _logger.info("APROBANDO SOLICITUD: %s", record.name)
-            _logger.info("Orden: %s", record.pos_order_id.name)
-            _logger.info("Total orden: %s", record.pos_order_id.amount_total)
-            _logger.info("Monto solicitado: %s", record.amount_requested)
+            _logger.debug("=" * 80)
+            _logger.debug("APROBANDO SOLICITUD: %s", record.name)
+            _logger.debug("Orden: %s", record.pos_order_id.name)
+            _logger.debug("Total orden: %s", record.pos_order_id.amount_total)
+            _logger.debug("Monto solicitado: %s", record.amount_requested)
             
             # Calcular total de pagos ANTES de agregar el nuevo
             current_payments = record.pos_order_id.payment_ids
             total_current_payments = sum(current_payments.mapped('amount'))
             
-            _logger.info("Total pagos actuales: %s", total_current_payments)
-            _logger.info("Pagos actuales (%s):", len(current_payments))
-            for p in current_payments:
-                _logger.info("  - %s: %s (ID: %s)", p.payment_method_id.name, p.amount, p.id)
+            _logger.debug("Total pagos actuales: %s", total_current_payments)
+            _logger.debug("Pagos actuales (%s):", len(current_payments))
+            if _logger.isEnabledFor(logging.DEBUG):
+                for p in current_payments:
+                    _logger.debug("  - %s: %s (ID: %s)", p.payment_method_id.name, p.amount, p.id)
             
             # Guardar método antiguo (si viene del backend con OLD_PAYMENTS)
             old_payment_method_id = None
@@ -50,13 +51,13 @@ class PosPaymentApprovalRequest(models.Model):
                         existing_old_payments = old_payments.exists()
                         if existing_old_payments:
                             old_payment_method_id = existing_old_payments[0].payment_method_id.id
-                            _logger.info("Método antiguo (backend): %s", existing_old_payments[0].payment_method_id.name)
+                            _logger.debug("Método antiguo (backend): %s", existing_old_payments[0].payment_method_id.name)
                         
                 except Exception as e:
                     _logger.error("Error al parsear OLD_PAYMENTS: %s", e)
         
         # Llamar a super para crear el nuevo pago
-        _logger.info("Creando nuevo pago...")
+        _logger.debug("Creando nuevo pago...")
         result = super().action_approve_request()
         
         # Verificar que se creó el payment_id
@@ -74,7 +75,7 @@ class PosPaymentApprovalRequest(models.Model):
                     payment = self.env['pos.payment'].create(payment_vals)
                     record.payment_id = payment.id
                     record.pos_order_id.write({'payment_ids': [(4, payment.id)]})
-                    _logger.info("✓ Payment creado manualmente")
+                    _logger.debug("✓ Payment creado manualmente")
                 except Exception as e:
                     _logger.error("Error al crear payment: %s", e)
             
@@ -86,14 +87,14 @@ class PosPaymentApprovalRequest(models.Model):
             payments_before_new = [p for p in record.pos_order_id.payment_ids if p.id != record.payment_id.id]
             total_before_new = sum(p.amount for p in payments_before_new)
             
-            _logger.info("\n🤔 ANÁLISIS DE DECISIÓN:")
-            _logger.info("Total orden: %s", order_total)
-            _logger.info("Total pagos antes del nuevo: %s", total_before_new)
-            _logger.info("Monto del nuevo pago: %s", record.amount_requested)
+            _logger.debug("\n🤔 ANÁLISIS DE DECISIÓN:")
+            _logger.debug("Total orden: %s", order_total)
+            _logger.debug("Total pagos antes del nuevo: %s", total_before_new)
+            _logger.debug("Monto del nuevo pago: %s", record.amount_requested)
             
             # Calcular espacio disponible
             remaining_space = order_total - total_before_new
-            _logger.info("Espacio disponible: %s", remaining_space)
+            _logger.debug("Espacio disponible: %s", remaining_space)
             
             # Decisión: ¿Reemplazar o Agregar?
             should_replace = False
@@ -102,7 +103,7 @@ class PosPaymentApprovalRequest(models.Model):
             payments_complete = float_compare(total_before_new, order_total, precision_rounding=precision) >= 0
             
             if payments_complete:
-                _logger.info("✓ Los pagos ya están completos")
+                _logger.debug("✓ Los pagos ya están completos")
                 
                 # Buscar si existe un pago con el mismo método y monto
                 # (excluyendo el que acabamos de crear)
@@ -121,51 +122,52 @@ class PosPaymentApprovalRequest(models.Model):
                     
                     if matches_amount and (matches_method or not old_payment_method_id):
                         similar_payments.append(payment)
-                        _logger.info("  Pago similar encontrado: %s - %s (ID: %s)", 
+                        _logger.debug("  Pago similar encontrado: %s - %s (ID: %s)", 
                                    payment.payment_method_id.name,
                                    payment.amount,
                                    payment.id)
                 
                 if similar_payments:
                     should_replace = True
-                    _logger.info("✓ DECISIÓN: REEMPLAZAR (hay %s pagos similares)", len(similar_payments))
+                    _logger.debug("✓ DECISIÓN: REEMPLAZAR (hay %s pagos similares)", len(similar_payments))
                 else:
-                    _logger.info("✗ No hay pagos similares para reemplazar")
+                    _logger.debug("✗ No hay pagos similares para reemplazar")
             else:
-                _logger.info("✓ Los pagos aún no están completos (espacio: %s)", remaining_space)
+                _logger.debug("✓ Los pagos aún no están completos (espacio: %s)", remaining_space)
             
             # EJECUTAR DECISIÓN
             if should_replace:
-                _logger.info("\n🔄 EJECUTANDO REEMPLAZO:")
+                _logger.debug("\n🔄 EJECUTANDO REEMPLAZO:")
                 
                 # Eliminar UNO de los pagos similares (el más reciente)
                 payment_to_remove = max(similar_payments, key=lambda p: p.id)
                 
-                _logger.info("Eliminando: %s - %s (ID: %s)", 
+                _logger.debug("Eliminando: %s - %s (ID: %s)", 
                            payment_to_remove.payment_method_id.name,
                            payment_to_remove.amount,
                            payment_to_remove.id)
                 
                 if len(similar_payments) > 1:
-                    _logger.info("⚠️ Había %s pagos similares, eliminando el más reciente", 
+                    _logger.debug("⚠️ Había %s pagos similares, eliminando el más reciente", 
                                len(similar_payments))
                 
                 payment_to_remove.sudo().unlink()
-                _logger.info("✓ Pago reemplazado exitosamente")
+                _logger.debug("✓ Pago reemplazado exitosamente")
             else:
-                _logger.info("\n➕ SOLO AGREGAR (sin reemplazar)")
+                _logger.debug("\n➕ SOLO AGREGAR (sin reemplazar)")
             
             # VALIDACIÓN FINAL
             final_payments = record.pos_order_id.payment_ids
             final_total = sum(final_payments.mapped('amount'))
             
-            _logger.info("\n📊 ESTADO FINAL:")
-            _logger.info("Total orden: %s", order_total)
-            _logger.info("Total pagos: %s", final_total)
-            _logger.info("Diferencia: %s", final_total - order_total)
-            _logger.info("Pagos finales (%s):", len(final_payments))
-            for p in final_payments:
-                _logger.info("  - %s: %s (ID: %s)", p.payment_method_id.name, p.amount, p.id)
+            _logger.debug("\n📊 ESTADO FINAL:")
+            _logger.debug("Total orden: %s", order_total)
+            _logger.debug("Total pagos: %s", final_total)
+            _logger.debug("Diferencia: %s", final_total - order_total)
+            _logger.debug("Pagos finales (%s):", len(final_payments))
+            if _logger.isEnabledFor(logging.DEBUG):
+                for p in final_payments:
+                    _logger.debug("  - %s: %s (ID: %s)", p.payment_method_id.name, p.amount, p.id)
             
             # Advertencia si excede
             if float_compare(final_total, order_total, precision_rounding=precision) > 0:
@@ -217,7 +219,7 @@ class PosPaymentApprovalRequest(models.Model):
                 'note': f"{current_note}\n{approval_note}"
             })
         
-        _logger.info("=" * 80)
+        _logger.debug("=" * 80)
         
         return result
     
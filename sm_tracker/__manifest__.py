@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Tracker - Seguimiento de Proyectos',
-    'version': '17.0.1.0.5',
+    'version': '17.0.1.0.10',
     'category': 'Project',
     'summary': 'Seguimiento de proyectos con control de tiempo y servicios',
     'description': """
@@ -30,6 +30,7 @@
        'security/tracker_security.xml',
         'security/ir.model.access.csv',
         'data/tracker_data.xml',
+        'data/ir_cron.xml',
         'views/tracker_task_views.xml',
         'views/tracker_task_pin_wizard_views.xml',
         'views/tracker_boleta_despacho.xml',  # DEBE IR ANTES de project_views
@@ -40,6 +41,13 @@
         'views/tracker_menus.xml',
         # 'views/tracker_migration_action.xml',  # Ya no necesario
         'views/tracker_reports.xml',
+        'views/tracker_stock_shortage_views.xml',
+        'views/tracker_perf_sample_views.xml',
+        'views/tracker_dashboard_views.xml',
+        'views/tracker_kiosk_views.xml',
+        'views/tracker_creation_job_views.xml',
+        'views/tracker_store_mapping_views.xml',
+        'views/tracker_service_category_views.xml',
         'views/tracker_project_cancel_wizard_views.xml',
         'views/tracker_project_change_store_wizard_views.xml',
         'views/sale_order_views.xml',
@@ -47,6 +55,16 @@
         'views/pos_order_views.xml',
         'views/product_template_views.xml',
     ],
+    'assets': {
+        'web.assets_backend': [
+            'sm_tracker/static/src/js/tracker_dashboard.js',
+            'sm_tracker/static/src/xml/tracker_dashboard.xml',
+            'sm_tracker/static/src/js/tracker_live_timer.js',
+            'sm_tracker/static/src/xml/tracker_live_timer.xml',
+            'sm_tracker/static/src/js/tracker_kiosk.js',
+            'sm_tracker/static/src/xml/tracker_kiosk.xml',
+        ],
+    },
     'demo': [],
     'installable': True,
     'application': True,
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.http import content_disposition, request
+
+
+class TrackerDashboardController(http.Controller):
+
+    @http.route(['/sm_tracker/dashboard/data'], type='json', auth="user")
+    def dashboard_data(self, store_ids=None, **kw):
+        """Indicadores por tienda para el tablero del tracker (con caché de corta duración)"""
+        if store_ids:
+            store_ids = [int(store_id) for store_id in store_ids]
+        return request.env['tracker.dashboard'].get_dashboard_data(store_ids)
+
+
+class TrackerKioskController(http.Controller):
+
+    @http.route(['/sm_tracker/kiosk/tasks'], type='json', auth="user")
+    def kiosk_tasks(self, store_id=None, **kw):
+        """Tareas abiertas para la pantalla del kiosco (las reglas por tienda aplican)"""
+        domain = [
+            ('state', 'in', ['pending', 'ready', 'in_progress', 'paused']),
+            ('employee_id', '!=', False),
+        ]
+        if store_id:
+            domain.append(('analytic_account_id', '=', int(store_id)))
+        tasks = request.env['tracker.task'].search(domain, order='promise_date, id', limit=200)
+        return tasks._kiosk_task_data()
+
+    @http.route(['/sm_tracker/kiosk/action'], type='json', auth="user")
+    def kiosk_action(self, action, pin, task_id=None, task_ids=None, **kw):
+        """Validar NIP y ejecutar start/pause/complete en una sola petición, sin wizard
+
+        Acepta una tarea (task_id) o varias del mismo operario (task_ids).
+        """
+        ids = list(dict.fromkeys(int(tid) for tid in (task_ids or [task_id]) if tid))
+        tasks = request.env['tracker.task'].browse(ids).exists()
+        if not tasks or len(tasks) != len(ids):
+            return {'ok': False, 'error': _('La tarea ya no existe.')}
+        try:
+            data = tasks._kiosk_execute(action, str(pin or ''))
+        except (UserError, ValidationError) as e:
+            request.env.cr.rollback()
+            return {'ok': False, 'error': e.args[0]}
+        return {'ok': True, 'tasks': data}
+
+
+class TrackerBoletaController(http.Controller):
+
+    @http.route(['/sm_tracker/boletas/zip'], type='http', auth="user")
+    def boletas_zip(self, ids, **kw):
+        """Descargar en un ZIP las boletas de despacho de varios proyectos"""
+        project_ids = [int(project_id) for project_id in ids.split(',') if project_id]
+        projects = request.env['tracker.project'].browse(project_ids).exists()
+        projects.check_access_rights('read')
+        projects.check_access_rule('read')
+        content = projects._render_boletas_zip()
+        return request.make_response(content, headers=[
+            ('Content-Type', 'application/zip'),
+            ('Content-Length', len(content)),
+            ('Content-Disposition', content_disposition('Boletas_Despacho.zip')),
+        ])
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Generar la elegibilidad de operarios a partir de sus tiendas y servicios"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['tracker.operator.eligibility']._rebuild()
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Clasificar los servicios existentes y recalcular las banderas de todo el historial"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['tracker.service.category']._assign_legacy_products()
+    env['tracker.project']._sync_service_categories()
@@ -4,7 +4,7 @@ from . import tracker_project
 from . import tracker_task
 from . import tracker_timesheet
 from . import tracker_employee
-#from . import tracker_stock_shortage
+from . import tracker_stock_shortage
 from . import sale_order
 from . import account_move
 from . import account_analytic_account 
@@ -12,4 +12,20 @@ from . import pos_order
 from . import tracker_project_cancel_wizard
 from . import tracker_project_change_store_wizard
 from . import tracker_task_pin_wizard
-from . import product_template 
\ No newline at end of file
+from . import product_template
+from . import tracker_service_closure
+from . import mrp_bom
+from . import tracker_perf_sample
+from . import stock_move
+from . import tracker_dashboard
+from . import tracker_report 
+from . import tracker_hours_daily
+from . import tracker_creation_job
+from . import tracker_store_mapping
+from . import pos_config
+from . import tracker_project_store_change
+from . import tracker_service_category
+from . import product_product
+from . import tracker_task_scheduler
+from . import tracker_service_duration_stat
+from . import tracker_operator_eligibility
\ No newline at end of file
@@ -10,4 +10,16 @@ class AccountAnalyticAccount(models.Model):
         'stock.warehouse',
         string='Almacén',
         help='Almacén asociado a esta tienda para consultar disponibilidad de stock'
-    )
\ No newline at end of file
+    )
+
+    def write(self, vals):
+        res = super(AccountAnalyticAccount, self).write(vals)
+        # El almacén de la tienda define la tienda en caché de las ventas
+        if {'warehouse_id', 'active'} & set(vals):
+            self.env['tracker.store.mapping']._clear_store_cache()
+        return res
+
+    def unlink(self):
+        res = super(AccountAnalyticAccount, self).unlink()
+        self.env['tracker.store.mapping']._clear_store_cache()
+        return res
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+
+
+class MrpBom(models.Model):
+    _inherit = 'mrp.bom'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        boms = super(MrpBom, self).create(vals_list)
+        self.env['tracker.service.closure']._invalidate_templates(boms.product_tmpl_id)
+        return boms
+
+    def write(self, vals):
+        templates = self.product_tmpl_id
+        res = super(MrpBom, self).write(vals)
+        self.env['tracker.service.closure']._invalidate_templates(templates | self.product_tmpl_id)
+        return res
+
+    def unlink(self):
+        templates = self.product_tmpl_id
+        res = super(MrpBom, self).unlink()
+        self.env['tracker.service.closure']._invalidate_templates(templates)
+        return res
+
+
+class MrpBomLine(models.Model):
+    _inherit = 'mrp.bom.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(MrpBomLine, self).create(vals_list)
+        self.env['tracker.service.closure']._invalidate_templates(lines.bom_id.product_tmpl_id)
+        return lines
+
+    def write(self, vals):
+        templates = self.bom_id.product_tmpl_id
+        res = super(MrpBomLine, self).write(vals)
+        self.env['tracker.service.closure']._invalidate_templates(templates | self.bom_id.product_tmpl_id)
+        return res
+
+    def unlink(self):
+        templates = self.bom_id.product_tmpl_id
+        res = super(MrpBomLine, self).unlink()
+        self.env['tracker.service.closure']._invalidate_templates(templates)
+        return res
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+
+
+class PosConfig(models.Model):
+    _inherit = 'pos.config'
+
+    def write(self, vals):
+        res = super(PosConfig, self).write(vals)
+        # La cuenta analítica define la tienda en caché del punto de venta
+        if 'analytic_account_id' in vals:
+            self.env['tracker.store.mapping']._clear_store_cache()
+        return res
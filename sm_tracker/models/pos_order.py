@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from collections import defaultdict
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from .tracker_perf_sample import tracker_perf
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -25,393 +28,196 @@ class PosOrder(models.Model):
     
     @api.depends('lines.product_id', 'lines.qty')
     def _compute_has_service_products(self):
-        """Detectar si la orden tiene productos de servicio (con tracker_active)"""
-        for order in self:
-            has_service = False
-            _logger.info('=== VERIFICANDO SERVICIOS PARA POS %s ===', order.name or 'Nuevo')
-            
-            for line in order.lines:
-                if not line.product_id:
-                    continue
-                    
-                _logger.info('Línea: %s (tipo: %s, qty: %s, tracker_active: %s)', 
-                           line.product_id.name, 
-                           line.product_id.type,
-                           line.qty,
-                           line.product_id.tracker_active)
-                
-                # Verificar si es servicio directo con tracker_active=True
-                if line.product_id.type == 'service' and line.product_id.tracker_active:
-                    _logger.info('  -> SERVICIO DIRECTO encontrado: %s', line.product_id.name)
-                    has_service = True
-                    break
-                
-                # Verificar si tiene servicios en BoM (con tracker_active)
-                if self._check_bom_for_services(line.product_id):
-                    _logger.info('  -> SERVICIO EN BOM encontrado para: %s', line.product_id.name)
-                    has_service = True
-                    break
-            
-            order.has_service_products = has_service
-            _logger.info('Resultado has_service_products para %s: %s', 
-                       order.name or 'Nuevo', has_service)
-    
-    def _check_bom_for_services(self, product):
-        """Verificar recursivamente si un producto tiene servicios en su BoM (con tracker_active)"""
-        bom = self.env['mrp.bom'].search([
-            ('product_tmpl_id', '=', product.product_tmpl_id.id)
-        ], limit=1)
+        """Detectar si la orden tiene productos de servicio (con tracker_active)
         
-        if not bom:
-            return False
-        
-        _logger.debug('  BoM encontrado para %s con %d líneas', product.name, len(bom.bom_line_ids))
+        Se resuelve en lote: los productos de todas las líneas y su índice de
+        servicios por BoM se leen una sola vez para todo el recordset.
+        """
+        service_product_ids = self.env['tracker.service.closure']._get_service_product_ids(
+            self.lines.product_id
+        )
         
-        for line in bom.bom_line_ids:
-            # Verificar que el servicio tenga tracker_active=True
-            if line.product_id.type == 'service' and line.product_id.tracker_active:
-                _logger.debug('    -> Componente SERVICIO: %s', line.product_id.name)
-                return True
-            
-            if self._check_bom_for_services(line.product_id):
-                return True
+        for order in self:
+            order.has_service_products = any(
+                product_id in service_product_ids for product_id in order.lines.product_id.ids
+            )
         
-        return False
+        _logger.debug('has_service_products calculado para %d órdenes POS', len(self))
     
     @api.model_create_multi
+    @tracker_perf('pos.order.create')
     def create(self, vals_list):
-        """Override create para generar tracker después de crear la orden"""
+        """Override create para encolar el tracker después de crear la orden"""
         orders = super(PosOrder, self).create(vals_list)
         
-        _logger.info('=== POS CREATE: %d órdenes creadas ===', len(orders))
+        _logger.debug('=== POS CREATE: %d órdenes creadas ===', len(orders))
         
-        for order in orders:
-            _logger.info('Orden POS creada: %s, Estado: %s, Has Services: %s', 
-                       order.name, order.state, order.has_service_products)
-            
-            # Intentar crear tracker si aplica
-            self._try_create_tracker(order)
+        orders._enqueue_tracker_creation()
         
         return orders
     
+    @tracker_perf('pos.order.write')
     def write(self, vals):
-        """Override write para crear tracker cuando cambia el estado"""
-        # Guardar estados anteriores
-        old_states = {order.id: order.state for order in self}
-        
+        """Override write para encolar el tracker cuando cambia el estado"""
         res = super(PosOrder, self).write(vals)
         
         # Si cambió el estado, verificar si necesita tracker
         if 'state' in vals:
-            _logger.info('=== POS WRITE: Estado cambió a %s para %d órdenes ===', 
+            _logger.debug('=== POS WRITE: Estado cambió a %s para %d órdenes ===', 
                        vals.get('state'), len(self))
-            
-            for order in self:
-                old_state = old_states.get(order.id)
-                _logger.info('Orden %s: %s -> %s', order.name, old_state, order.state)
-                self._try_create_tracker(order)
+            self._enqueue_tracker_creation()
         
         return res
     
+    @tracker_perf('pos.order.enqueue_tracker_creation')
+    def _enqueue_tracker_creation(self):
+        """Registrar en la cola de creación las órdenes que necesitan tracker
+        
+        La sincronización del POS solo inserta el trabajo; el proyecto, las tareas
+        y los faltantes se crean después en el cron (tracker.creation.job).
+        """
+        orders = self.filtered(lambda o: o._is_tracker_eligible())
+        if orders:
+            self.env['tracker.creation.job'].sudo()._enqueue(orders)
+        return orders
+    
     def _try_create_tracker(self, order):
-        """Intentar crear tracker para una orden si cumple las condiciones"""
+        """Compatibilidad: encolar el tracker de una orden si cumple las condiciones"""
+        return bool(order._enqueue_tracker_creation())
+    
+    def _is_tracker_eligible(self):
+        """Verificar si la orden cumple las condiciones para generar tracker"""
+        self.ensure_one()
         # Validar que tenga servicios
-        if not order.has_service_products:
-            _logger.debug('Orden %s no tiene servicios, skip tracker', order.name)
+        if not self.has_service_products:
+            _logger.debug('Orden %s no tiene servicios, skip tracker', self.name)
             return False
         
         # Validar que no tenga tracker ya creado
-        if order.tracker_project_ids:
-            _logger.debug('Orden %s ya tiene tracker, skip', order.name)
+        if self.tracker_project_ids:
+            _logger.debug('Orden %s ya tiene tracker, skip', self.name)
             return False
         
         # Validar que NO sea devolución (cantidades negativas o monto negativo)
-        is_refund = order.amount_total < 0 or any(line.qty < 0 for line in order.lines)
+        is_refund = self.amount_total < 0 or any(line.qty < 0 for line in self.lines)
         if is_refund:
-            _logger.info('Orden %s es DEVOLUCIÓN/NOTA DE CRÉDITO, NO se crea tracker', order.name)
+            _logger.debug('Orden %s es DEVOLUCIÓN/NOTA DE CRÉDITO, NO se crea tracker', self.name)
             return False
         
         # Validar estado - crear tracker cuando la orden esté pagada o completada
-        if order.state not in ['paid', 'done', 'invoiced']:
+        if self.state not in ['paid', 'done', 'invoiced']:
             _logger.debug('Orden %s en estado %s, esperando paid/done/invoiced', 
-                        order.name, order.state)
+                        self.name, self.state)
             return False
         
-        # Intentar crear el tracker
-        _logger.info('>>> CREANDO TRACKER para orden POS %s <<<', order.name)
-        try:
-            return order._auto_create_tracker_project()
-        except Exception as e:
-            _logger.error('ERROR al crear tracker para POS %s: %s', order.name, str(e), exc_info=True)
-            return False
+        return True
     
+    @tracker_perf('pos.order.auto_create_tracker_project')
     def _auto_create_tracker_project(self):
         """Crear proyecto tracker automáticamente desde orden POS"""
         self.ensure_one()
+        return self._create_tracker_projects().get(self.id, False)
+    
+    @tracker_perf('pos.order.create_tracker_projects')
+    def _create_tracker_projects(self):
+        """Crear los trackers de varias órdenes POS en una sola pasada
+        
+        Pensado para las órdenes que sincroniza una sesión offline: el índice de
+        servicios, el partner genérico y los pickings pendientes se leen una vez
+        para todas, y proyectos y tareas se crean con un create() por modelo.
+        Devuelve {order_id: proyecto}.
+        """
+        Closure = self.env['tracker.service.closure']
+        closures = Closure._get_closures(self.lines.product_id.product_tmpl_id)
+        public_partner = self.env.ref('base.public_partner')
+        
+        # Pickings pendientes de todas las órdenes en una sola búsqueda
+        moves_by_order = defaultdict(lambda: self.env['stock.move'])
+        pickings = self.env['stock.picking'].search([
+            ('pos_order_id', 'in', self.ids),
+            ('state', 'not in', ['done', 'cancel'])
+        ])
+        for picking in pickings:
+            moves_by_order[picking.pos_order_id.id] |= picking.move_ids
         
-        _logger.info('=== CREANDO TRACKER PROJECT PARA %s ===', self.name)
-        
-        # Buscar cuenta analítica
-        analytic_account = self._get_analytic_account()
-        
-        if not analytic_account:
-            _logger.warning('❌ No se pudo crear tracker para POS %s: No hay cuenta analítica', self.name)
-            return False
-        
-        _logger.info('✓ Cuenta analítica: %s', analytic_account.name)
-        
-        # Determinar partner
-        partner = self.partner_id if self.partner_id else self.env.ref('base.public_partner')
-        _logger.info('✓ Partner: %s', partner.name)
-        
-        # Determinar usuario responsable
-        user_id = self.user_id.id if self.user_id else self.env.user.id
-        _logger.info('✓ Usuario responsable: %s', self.env['res.users'].browse(user_id).name)
-        
-        # Obtener referencia correcta de POS
-        pos_reference = self.pos_reference if hasattr(self, 'pos_reference') and self.pos_reference else self.name
-        _logger.info('✓ Referencia POS: %s', pos_reference)
-        
-        # Crear proyecto SIN fecha prometida y SIN responsable
-        project_vals = {
-            'pos_order_id': self.id,
-            'partner_id': partner.id,
-            'analytic_account_id': analytic_account.id,
-            # user_id se deja vacío intencionalmente - se asignará antes de entregar
-        }
-        
-        _logger.info('Valores del proyecto: %s', project_vals)
-        project = self.env['tracker.project'].create(project_vals)
-        _logger.info('✓✓✓ Proyecto tracker %s CREADO para POS %s (sin fecha prometida)', project.name, pos_reference)
-        
-        # Obtener servicios
-        service_products = self._get_service_products_from_bom()
-        
-        if not service_products:
-            _logger.warning('⚠ No se encontraron servicios específicos en POS %s', pos_reference)
-            return project
-        
-        # Crear tareas
-        _logger.info('Creando %d tarea(s)...', len(service_products))
-        task_obj = self.env['tracker.task']
-        for product, qty in service_products.items():
-            task_vals = {
-                'project_id': project.id,
-                'product_id': product.id,
-                'name': product.name,
-                'quantity': qty,
-                'analytic_account_id': analytic_account.id,
-            }
-            task = task_obj.create(task_vals)
-            _logger.info('  ✓ Tarea creada: %s (qty: %s)', product.name, qty)
-        
-        _logger.info('=== TRACKER CREATION COMPLETADO ===')
-        
-        # Calcular abasto basado en almacén de la tienda
-        self._calculate_stock_shortage(project, analytic_account)
-        
-        return project
+        entries = []
+        for order in self:
+            # Buscar cuenta analítica
+            analytic_account = order._get_analytic_account()
+            if not analytic_account:
+                _logger.warning('❌ No se pudo crear tracker para POS %s: No hay cuenta analítica', order.name)
+                continue
+            
+            service_products = Closure._explode_services([
+                (line.product_id, line.qty) for line in order.lines
+            ], closures)
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug('=== SERVICIOS ENCONTRADOS EN %s: %d ===', order.name, len(service_products))
+                for product, qty in service_products.items():
+                    _logger.debug('  - %s: %s', product.name, qty)
+            
+            # Crear proyecto SIN fecha prometida y SIN responsable
+            entries.append({
+                'order_field': 'pos_order_id',
+                'order': order,
+                'partner': order.partner_id or public_partner,
+                'analytic_account': analytic_account,
+                'services': service_products,
+                'moves': moves_by_order[order.id],
+            })
+        
+        return self.env['tracker.project']._create_from_orders(entries)
     
+    @tracker_perf('pos.order.calculate_stock_shortage')
     def _calculate_stock_shortage(self, project, analytic_account):
         """Calcular faltantes de stock basado en los pickings y cantidad real en almacén"""
         self.ensure_one()
         
-        # Obtener almacén de la tienda
-        warehouse = analytic_account.warehouse_id if analytic_account.warehouse_id else False
-        
-        if not warehouse:
-            _logger.warning('⚠ Tienda %s no tiene almacén configurado, no se puede calcular abasto', 
-                          analytic_account.name)
-            return
-        
-        _logger.info('=== CALCULANDO ABASTO PARA ALMACÉN %s ===', warehouse.name)
-        
-        # Obtener ubicación de stock del almacén (donde está el inventario físico)
-        stock_location = warehouse.lot_stock_id
-        
-        if not stock_location:
-            _logger.warning('⚠ Almacén %s no tiene ubicación de stock configurada', warehouse.name)
-            return
-        
-        _logger.info('Ubicación de stock: %s (ID: %s)', stock_location.complete_name, stock_location.id)
-        
-        # Limpiar registros de abasto previos del proyecto
-        self.env['tracker.stock.shortage'].search([('project_id', '=', project.id)]).unlink()
-        
         # Buscar pickings asociados a esta orden POS
         pickings = self.env['stock.picking'].search([
             ('pos_order_id', '=', self.id),
             ('state', 'not in', ['done', 'cancel'])
         ])
         
-        if not pickings:
-            _logger.info('No hay pickings pendientes para verificar abasto')
-            return
-        
-        _logger.info('Pickings encontrados: %s', ', '.join(pickings.mapped('name')))
-        
-        shortage_obj = self.env['tracker.stock.shortage']
-        products_checked = set()
-        
-        # Revisar movimientos de stock de los pickings
-        for picking in pickings:
-            _logger.info('Revisando picking: %s (estado: %s)', picking.name, picking.state)
-            
-            for move in picking.move_ids:
-                product = move.product_id
-                
-                # Solo verificar productos almacenables
-                if not product or product.type != 'product':
-                    continue
-                
-                # Evitar duplicados
-                if product.id in products_checked:
-                    continue
-                
-                products_checked.add(product.id)
-                
-                demand_qty = move.product_uom_qty
-                
-                # Buscar cantidad directamente en stock.quant
-                quants = self.env['stock.quant'].search([
-                    ('product_id', '=', product.id),
-                    ('location_id', '=', stock_location.id),
-                ])
-                product_qty = sum(quants.mapped('quantity'))
-                
-                # Solo crear registro si NO hay existencia en stock.quant
-                if product_qty <= 0:
-                    shortage_vals = {
-                        'project_id': project.id,
-                        'product_id': product.id,
-                        'demand_qty': demand_qty,
-                        'available_qty': product_qty,
-                        'state': 'sin_abasto',
-                        'warehouse_id': warehouse.id,
-                        'analytic_account_id': analytic_account.id,
-                    }
-                    shortage_obj.create(shortage_vals)
-        
-        _logger.info('=== CÁLCULO DE ABASTO COMPLETADO ===')
+        self.env['tracker.stock.shortage']._sync_project_shortage(
+            project, analytic_account, pickings.move_ids
+        )
         return project
     
+    @tracker_perf('pos.order.get_analytic_account')
     def _get_analytic_account(self):
-        """Buscar cuenta analítica para el tracker - PRIORIDAD: sh_pos_order_analytic_account"""
-        analytic_account = False
+        """Buscar cuenta analítica para el tracker - PRIORIDAD: sh_pos_order_analytic_account
+        
+        La tienda asignada al punto de venta sale de tracker.store.mapping, en
+        caché por pos.config; el respaldo por nombre solo se busca sin asignación.
+        """
+        Analytic = self.env['account.analytic.account']
         
         # PRIORIDAD 1: Campo sh_pos_order_analytic_account (módulo Softhealer)
         if hasattr(self, 'sh_pos_order_analytic_account') and self.sh_pos_order_analytic_account:
-            analytic_account = self.sh_pos_order_analytic_account
-            _logger.info('✓ Cuenta analítica encontrada en sh_pos_order_analytic_account: %s', analytic_account.name)
-            return analytic_account
-        
-        # PRIORIDAD 2: Desde la configuración del POS (campo personalizado)
-        if self.session_id and self.session_id.config_id:
-            config = self.session_id.config_id
-            _logger.info('Buscando cuenta analítica en config POS: %s', config.name)
-            
-            if hasattr(config, 'analytic_account_id') and config.analytic_account_id:
-                analytic_account = config.analytic_account_id
-                _logger.info('  -> Encontrada en config.analytic_account_id: %s', analytic_account.name)
-                return analytic_account
+            _logger.debug('✓ Cuenta analítica encontrada en sh_pos_order_analytic_account: %s',
+                          self.sh_pos_order_analytic_account.name)
+            return self.sh_pos_order_analytic_account
+        
+        # PRIORIDAD 2: Asignación del punto de venta o su configuración (en caché)
+        config = self.session_id.config_id
+        if config:
+            store_id = self.env['tracker.store.mapping']._get_pos_config_store(config.id)
+            if store_id:
+                _logger.debug('  -> Tienda del punto de venta %s: %s', config.name, store_id)
+                return Analytic.browse(store_id)
         
         # PRIORIDAD 3: Desde las líneas de la orden
-        _logger.info('Buscando cuenta analítica en líneas de orden...')
         for line in self.lines:
-            # Buscar en account_analytic_line o similar
             if hasattr(line, 'analytic_account_id') and line.analytic_account_id:
-                analytic_account = line.analytic_account_id
-                _logger.info('  -> Encontrada en línea: %s', analytic_account.name)
-                return analytic_account
-        
-        # PRIORIDAD 4: Buscar cuenta analítica por nombre del POS
-        if self.session_id and self.session_id.config_id:
-            _logger.info('Buscando cuenta analítica por nombre del POS...')
-            config_name = self.session_id.config_id.name
-            analytic_account = self.env['account.analytic.account'].search([
-                ('name', 'ilike', config_name)
-            ], limit=1)
-            
-            if analytic_account:
-                _logger.info('  -> Encontrada por nombre: %s', analytic_account.name)
-                return analytic_account
+                _logger.debug('  -> Encontrada en línea: %s', line.analytic_account_id.name)
+                return line.analytic_account_id
         
-        # PRIORIDAD 5: Buscar cualquier cuenta analítica activa con "POS" o "TIENDA"
-        _logger.info('Buscando cuenta analítica genérica...')
-        analytic_account = self.env['account.analytic.account'].search([
-            '|', '|',
-            ('name', 'ilike', 'POS'),
-            ('name', 'ilike', 'TIENDA'),
-            ('name', 'ilike', 'PUNTO')
-        ], limit=1)
-        
-        if analytic_account:
-            _logger.info('  -> Encontrada cuenta genérica: %s', analytic_account.name)
-            return analytic_account
-        
-        # PRIORIDAD 6: Tomar la primera cuenta analítica disponible
-        _logger.info('Buscando primera cuenta analítica disponible...')
-        analytic_account = self.env['account.analytic.account'].search([], limit=1)
-        
-        if analytic_account:
-            _logger.info('  -> Usando primera disponible: %s', analytic_account.name)
+        # PRIORIDAD 4: Respaldo por nombre del POS / genérico
+        if config:
+            fallback = self.env['tracker.store.mapping']._get_pos_config_fallback_store(config)
         else:
+            fallback = Analytic.search([], limit=1)
+        if not fallback:
             _logger.warning('  -> NO SE ENCONTRÓ NINGUNA CUENTA ANALÍTICA')
-        
-        return analytic_account
-    
-    def _get_service_products_from_bom(self):
-        """Obtener productos de servicio de la orden POS y sus BoMs recursivamente (solo con tracker_active)"""
-        self.ensure_one()
-        service_products = {}
-        
-        pos_reference = self.pos_reference if hasattr(self, 'pos_reference') and self.pos_reference else self.name
-        _logger.info('=== EXTRAYENDO SERVICIOS DE LA ORDEN %s ===', pos_reference)
-        
-        def process_bom_recursive(product, qty, level=0):
-            indent = "  " * level
-            bom = self.env['mrp.bom'].search([
-                ('product_tmpl_id', '=', product.product_tmpl_id.id),
-            ], limit=1)
-            
-            if bom:
-                _logger.info('%sBoM encontrado para %s (%d componentes)', 
-                           indent, product.name, len(bom.bom_line_ids))
-                
-                for line in bom.bom_line_ids:
-                    component = line.product_id
-                    component_qty = qty * line.product_qty
-                    
-                    _logger.info('%s  -> %s (tipo: %s, qty: %s, tracker_active: %s)', 
-                               indent, component.name, component.type, component_qty, component.tracker_active)
-                    
-                    # Solo agregar servicios con tracker_active=True
-                    if component.type == 'service' and component.tracker_active:
-                        _logger.info('%s     ✓ SERVICIO AGREGADO', indent)
-                        if component in service_products:
-                            service_products[component] += component_qty
-                        else:
-                            service_products[component] = component_qty
-                    else:
-                        # Procesar recursivamente
-                        process_bom_recursive(component, component_qty, level + 1)
-            else:
-                # No tiene BoM, verificar si es servicio directo con tracker_active
-                if product.type == 'service' and product.tracker_active:
-                    _logger.info('%sServicio directo: %s (qty: %s)', indent, product.name, qty)
-                    if product in service_products:
-                        service_products[product] += qty
-                    else:
-                        service_products[product] = qty
-        
-        # Procesar cada línea de la orden
-        for line in self.lines:
-            if line.product_id:
-                _logger.info('Procesando línea: %s (qty: %s)', line.product_id.name, line.qty)
-                process_bom_recursive(line.product_id, line.qty)
-        
-        _logger.info('=== SERVICIOS ENCONTRADOS: %d ===', len(service_products))
-        for product, qty in service_products.items():
-            _logger.info('  - %s: %s', product.name, qty)
-        
-        return service_products
\ No newline at end of file
+        return Analytic.browse(fallback.id)
\ No newline at end of file
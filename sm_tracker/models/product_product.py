@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    tracker_service_category_id = fields.Many2one(
+        'tracker.service.category',
+        string='Categoría de Servicio',
+        index=True,
+        ondelete='set null',
+        help='Clasificación del servicio en el Tracker (CNC, cortes, pegado de canto, etc.)'
+    )
+
+    def write(self, vals):
+        res = super(ProductProduct, self).write(vals)
+        # Recalcular en bloque (SQL) los proyectos con tareas de estos servicios
+        if 'tracker_service_category_id' in vals:
+            self.env['tracker.project']._sync_service_categories(product_ids=self.ids)
+        return res
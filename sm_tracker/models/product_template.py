@@ -5,9 +5,35 @@ from odoo import models, fields, api
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
-    
+
     tracker_active = fields.Boolean(
         string='Activo en Tracker',
         default=True,
         help='Si está marcado, este producto/servicio creará proyectos en el Tracker'
-    )
\ No newline at end of file
+    )
+
+    tracker_service_category_id = fields.Many2one(
+        'tracker.service.category',
+        string='Categoría de Servicio',
+        compute='_compute_tracker_service_category_id',
+        inverse='_set_tracker_service_category_id',
+        help='Categoría del servicio en el Tracker (se guarda en la variante)'
+    )
+
+    @api.depends('product_variant_ids.tracker_service_category_id')
+    def _compute_tracker_service_category_id(self):
+        for template in self:
+            variants = template.product_variant_ids
+            template.tracker_service_category_id = variants.tracker_service_category_id if len(variants) == 1 else False
+
+    def _set_tracker_service_category_id(self):
+        for template in self:
+            if len(template.product_variant_ids) == 1:
+                template.product_variant_ids.tracker_service_category_id = template.tracker_service_category_id
+
+    def write(self, vals):
+        res = super(ProductTemplate, self).write(vals)
+        # Cambiar si es servicio tracker afecta el índice de servicios por BoM
+        if 'tracker_active' in vals or 'type' in vals or 'detailed_type' in vals:
+            self.env['tracker.service.closure']._invalidate_templates(self)
+        return res
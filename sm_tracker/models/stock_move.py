@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super(StockMove, self)._action_done(cancel_backorder=cancel_backorder)
+        
+        # Marcar solo los faltantes de proyectos abiertos con esos productos/ubicaciones
+        done_moves = moves.filtered(lambda m: m.state == 'done')
+        if done_moves:
+            self.env['tracker.stock.shortage']._mark_for_refresh(
+                done_moves.product_id,
+                done_moves.location_id | done_moves.location_dest_id,
+            )
+        return moves
+    
+    def write(self, vals):
+        if 'state' not in vals and 'picking_id' not in vals:
+            return super(StockMove, self).write(vals)
+        
+        # Solo importan los movimientos en waiting antes o después del cambio,
+        # con su picking anterior (si cambia de picking) y el nuevo
+        old_pickings = self.filtered(lambda m: m.state == 'waiting').picking_id
+        
+        res = super(StockMove, self).write(vals)
+        
+        pickings = old_pickings | self.filtered(lambda m: m.state == 'waiting').picking_id
+        if pickings:
+            self.env['tracker.project']._mark_waiting_stock_to_recompute(pickings)
+        return res
+    
+    def unlink(self):
+        # Los proyectos con movimientos en waiting borrados dejan de esperar stock
+        pickings = self.filtered(lambda m: m.state == 'waiting').picking_id
+        res = super(StockMove, self).unlink()
+        if pickings:
+            self.env['tracker.project']._mark_waiting_stock_to_recompute(pickings)
+        return res
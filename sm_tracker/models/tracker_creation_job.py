@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+import traceback
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import create_index, str2bool
+import logging
+
+_logger = logging.getLogger(__name__)
+
+CREATION_ASYNC_PARAM = 'sm_tracker.tracker_creation_async'
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_MINUTES = 5
+BACKOFF_MAX_MINUTES = 24 * 60
+
+# Campo del trabajo que apunta a cada tipo de orden
+ORDER_FIELDS = {
+    'sale.order': 'sale_order_id',
+    'pos.order': 'pos_order_id',
+}
+
+
+class TrackerCreationJob(models.Model):
+    """Cola (outbox) de creación de proyectos tracker.
+
+    La confirmación de ventas y la sincronización del POS solo registran un
+    trabajo por orden; un cron crea después los proyectos, tareas y faltantes
+    en lotes. Un trabajo por orden (restricción única) y la verificación de
+    proyectos existentes hacen que reintentar nunca duplique un proyecto.
+    """
+    _name = 'tracker.creation.job'
+    _description = 'Trabajo de Creación de Tracker'
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Orden',
+        readonly=True
+    )
+
+    sale_order_id = fields.Many2one(
+        'sale.order',
+        string='Orden de Venta',
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    pos_order_id = fields.Many2one(
+        'pos.order',
+        string='Orden POS',
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    state = fields.Selection([
+        ('pending', 'Pendiente'),
+        ('done', 'Procesado'),
+        ('failed', 'Fallido'),
+    ], string='Estado', default='pending', required=True, readonly=True, index=True)
+
+    attempts = fields.Integer(
+        string='Intentos',
+        readonly=True
+    )
+
+    next_attempt_at = fields.Datetime(
+        string='Próximo Intento',
+        readonly=True,
+        default=fields.Datetime.now
+    )
+
+    date_done = fields.Datetime(
+        string='Fecha de Proceso',
+        readonly=True
+    )
+
+    project_id = fields.Many2one(
+        'tracker.project',
+        string='Proyecto',
+        readonly=True,
+        ondelete='set null'
+    )
+
+    last_error = fields.Text(
+        string='Último Error',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('sale_order_uniq', 'unique(sale_order_id)', 'Ya existe un trabajo de tracker para esta venta.'),
+        ('pos_order_uniq', 'unique(pos_order_id)', 'Ya existe un trabajo de tracker para esta orden POS.'),
+    ]
+
+    def init(self):
+        # Solo los pendientes se consultan en cada ejecución del cron
+        create_index(self._cr, 'tracker_creation_job_pending_index', self._table,
+                     ['next_attempt_at', 'id'], where="state = 'pending'")
+
+    @api.model
+    def _is_async(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(CREATION_ASYNC_PARAM, 'True'))
+
+    @api.model
+    def _enqueue(self, orders):
+        """Registrar un trabajo por orden; las órdenes que ya tienen trabajo se ignoran"""
+        if not orders:
+            return self.browse()
+        field = ORDER_FIELDS[orders._name]
+        self.flush_model()
+        for order in orders:
+            # ON CONFLICT: dos transacciones simultáneas no pueden duplicar el trabajo
+            self.env.cr.execute("""
+                INSERT INTO tracker_creation_job
+                       (%s, name, state, attempts, next_attempt_at,
+                        create_uid, create_date, write_uid, write_date)
+                VALUES (%%s, %%s, 'pending', 0, now() at time zone 'UTC',
+                        %%s, now() at time zone 'UTC', %%s, now() at time zone 'UTC')
+                ON CONFLICT (%s) DO NOTHING
+            """ % (field, field), (order.id, order.name, self.env.uid, self.env.uid))
+        jobs = self.sudo().search([(field, 'in', orders.ids)])
+
+        if self._is_async():
+            cron = self.env.ref('sm_tracker.ir_cron_tracker_creation_jobs', raise_if_not_found=False)
+            if cron:
+                cron._trigger()
+        else:
+            jobs.filtered(lambda j: j.state == 'pending')._run()
+        return jobs
+
+    @api.model
+    def _acquire_pending(self, limit=None, ids=None):
+        """Tomar trabajos pendientes sin esperar a los que otro proceso ya tiene bloqueados
+        
+        Sin ``ids`` toma los vencidos (cron); con ``ids`` toma solo esos,
+        sin importar el próximo intento (procesar ahora).
+        """
+        self.flush_model()
+        if ids is not None:
+            if not ids:
+                return self.browse()
+            condition, params = "id IN %s", [tuple(ids)]
+        else:
+            condition, params = "next_attempt_at <= now() at time zone 'UTC'", []
+        self.env.cr.execute("""
+            SELECT id
+              FROM tracker_creation_job
+             WHERE state = 'pending'
+               AND %s
+          ORDER BY next_attempt_at, id
+             LIMIT %%s
+               FOR UPDATE SKIP LOCKED
+        """ % condition, params + [limit])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=100):
+        """Procesar un lote de trabajos; si quedan más, volver a disparar el cron"""
+        jobs = self._acquire_pending(batch_size)
+        jobs._run()
+        if len(jobs) == batch_size:
+            self.env.ref('sm_tracker.ir_cron_tracker_creation_jobs')._trigger()
+        return len(jobs)
+
+    def _run(self):
+        """Procesar los trabajos en lote por tipo de orden y compañía
+        
+        Cada lote corre en su propio savepoint; si falla, se reintenta trabajo
+        por trabajo para aislar la orden con problemas.
+        """
+        for field in ORDER_FIELDS.values():
+            jobs = self.filtered(field)
+            companies = jobs.mapped(field).company_id
+            for company in companies:
+                company_jobs = jobs.filtered(lambda j: j[field].company_id == company)
+                try:
+                    with self.env.cr.savepoint():
+                        company_jobs._process(field, company)
+                except Exception:
+                    _logger.warning('Falló el lote de %d trabajo(s) de tracker, procesando uno por uno',
+                                    len(company_jobs), exc_info=True)
+                    company_jobs._run_one_by_one(field, company)
+    
+    def _run_one_by_one(self, field, company):
+        for job in self:
+            try:
+                with self.env.cr.savepoint():
+                    job._process(field, company)
+            except Exception as e:
+                job._register_failure(e)
+    
+    def _process(self, field, company):
+        """Crear los trackers de las órdenes que aún no tienen proyecto (idempotente)"""
+        orders = self.mapped(field)
+        pending = orders.filtered(lambda o: not o.tracker_project_ids and o._is_tracker_eligible())
+        created = pending.with_company(company)._create_tracker_projects() if pending else {}
+        
+        now = fields.Datetime.now()
+        for job in self:
+            order = job[field]
+            project = created.get(order.id) or order.tracker_project_ids[:1]
+            if not project and order in pending:
+                # Elegible pero no se creó proyecto: reintentar, no darlo por hecho
+                job._register_failure(UserError(_(
+                    'No se creó ningún proyecto tracker para la orden elegible %s.'
+                ) % order.name))
+                continue
+            job.write({
+                'state': 'done',
+                'project_id': project.id,
+                'date_done': now,
+                'last_error': False,
+            })
+    
+    def _register_failure(self, error):
+        """Reprogramar con espera exponencial, o marcar como fallido al agotar intentos"""
+        self.ensure_one()
+        attempts = self.attempts + 1
+        delay = min(BACKOFF_BASE_MINUTES * 2 ** (attempts - 1), BACKOFF_MAX_MINUTES)
+        failed = attempts >= MAX_ATTEMPTS
+        _logger.warning('Error al crear tracker para %s (intento %d): %s', self.name, attempts, error)
+        self.write({
+            'attempts': attempts,
+            'state': 'failed' if failed else 'pending',
+            'next_attempt_at': fields.Datetime.now() + timedelta(minutes=delay),
+            'last_error': ''.join(traceback.format_exception_only(type(error), error)),
+        })
+
+    def action_retry(self):
+        """Volver a poner en cola los trabajos seleccionados"""
+        self.filtered(lambda j: j.state != 'done').write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt_at': fields.Datetime.now(),
+        })
+        self.env.ref('sm_tracker.ir_cron_tracker_creation_jobs')._trigger()
+        return True
+
+    def action_process_now(self):
+        """Procesar ahora los trabajos pendientes seleccionados
+        
+        Se bloquean con el mismo SKIP LOCKED que el cron; los que el cron ya
+        está procesando se omiten.
+        """
+        self._acquire_pending(ids=self.ids)._run()
+        return True
+
+    @api.autovacuum
+    def _gc_done_jobs(self):
+        """Borrar trabajos procesados de más de 30 días"""
+        limit_date = fields.Datetime.now() - timedelta(days=30)
+        self.search([('state', '=', 'done'), ('date_done', '<', limit_date)]).unlink()
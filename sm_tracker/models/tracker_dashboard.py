@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+
+# Caché por proceso: {(dbname, clave): (timestamp, datos)}
+_dashboard_cache = {}
+_dashboard_cache_lock = threading.Lock()
+
+DASHBOARD_TTL_PARAM = 'sm_tracker.dashboard_ttl'
+OPEN_PROJECT_STATES = ['pending', 'processing', 'pending_delivery']
+OPEN_TASK_STATES = ['pending', 'ready', 'in_progress', 'paused']
+
+
+class TrackerDashboard(models.AbstractModel):
+    _name = 'tracker.dashboard'
+    _description = 'Tablero de Tiendas del Tracker'
+
+    @api.model
+    def _get_dashboard_ttl(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(DASHBOARD_TTL_PARAM, 30))
+
+    @api.model
+    def _cache_get(self, key, ttl):
+        with _dashboard_cache_lock:
+            entry = _dashboard_cache.get((self.env.cr.dbname, key))
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    @api.model
+    def _cache_set(self, key, value):
+        with _dashboard_cache_lock:
+            _dashboard_cache[(self.env.cr.dbname, key)] = (time.monotonic(), value)
+
+    @api.model
+    def _get_allowed_store_ids(self):
+        """Tiendas visibles para el usuario (None = todas, para gerentes)"""
+        if self.env.user.has_group('sm_tracker.group_tracker_manager'):
+            return None
+        employee = self.env.user.employee_id
+        return set((employee.tracker_analytic_account_visualizacion_ids
+                    | employee.tracker_analytic_account_responsable_ids).ids)
+
+    @api.model
+    def _get_active_store_ids(self, ttl):
+        """Tiendas con proyectos abiertos (para gerentes sin filtro de tienda)"""
+        store_ids = self._cache_get('stores', ttl)
+        if store_ids is None:
+            groups = self.env['tracker.project'].sudo()._read_group(
+                [('state', 'in', OPEN_PROJECT_STATES)], ['analytic_account_id'], ['__count'],
+            )
+            store_ids = [store.id for store, count in groups if store]
+            self._cache_set('stores', store_ids)
+        return store_ids
+
+    @api.model
+    def get_dashboard_data(self, store_ids=None):
+        """Indicadores por tienda para el tablero, en caché por tienda durante un TTL corto"""
+        ttl = self._get_dashboard_ttl()
+        allowed = self._get_allowed_store_ids()
+        if store_ids:
+            store_ids = [sid for sid in store_ids if allowed is None or sid in allowed]
+        elif allowed is None:
+            store_ids = self._get_active_store_ids(ttl)
+        else:
+            store_ids = sorted(allowed)
+
+        result = {}
+        missing = []
+        for store_id in store_ids:
+            cached = self._cache_get(('store', store_id), ttl)
+            if cached is None:
+                missing.append(store_id)
+            else:
+                result[store_id] = cached
+
+        if missing:
+            for store_id, data in self._compute_store_data(missing).items():
+                self._cache_set(('store', store_id), data)
+                result[store_id] = data
+
+        return {
+            'stores': [result[store_id] for store_id in store_ids if store_id in result],
+            'ttl': ttl,
+            'generated_at': fields.Datetime.to_string(fields.Datetime.now()),
+        }
+
+    @api.model
+    def _compute_store_data(self, store_ids):
+        """Calcular los indicadores de varias tiendas con tres consultas agrupadas"""
+        stores = self.env['account.analytic.account'].sudo().browse(store_ids)
+        data = {
+            store.id: {
+                'id': store.id,
+                'name': store.display_name,
+                'states': defaultdict(int),
+                'overdue': 0,
+                'overdue_buckets': defaultdict(int),
+                'avg_delay_days': 0.0,
+                'cnc': 0,
+                'despacho_host': 0,
+                'open_tasks': 0,
+                'open_task_hours': 0.0,
+                'open_task_expected_hours': 0.0,
+                'running_timers': 0,
+            }
+            for store in stores
+        }
+        delay_totals = defaultdict(lambda: [0, 0])
+
+        project_groups = self.env['tracker.project'].sudo()._read_group(
+            [('analytic_account_id', 'in', store_ids)],
+            ['analytic_account_id', 'state', 'overdue_bucket', 'is_cnc', 'is_despacho_host'],
+            ['__count', 'delay_days:sum'],
+        )
+        for store, state, bucket, is_cnc, is_despacho, count, delay_sum in project_groups:
+            values = data.get(store.id)
+            if values is None:
+                continue
+            values['states'][state] += count
+            if state not in OPEN_PROJECT_STATES:
+                continue
+            delay_totals[store.id][0] += count
+            delay_totals[store.id][1] += delay_sum or 0
+            if bucket and bucket != 'on_time':
+                values['overdue'] += count
+                values['overdue_buckets'][bucket] += count
+            if is_cnc:
+                values['cnc'] += count
+            if is_despacho:
+                values['despacho_host'] += count
+
+        task_groups = self.env['tracker.task'].sudo()._read_group(
+            [('analytic_account_id', 'in', store_ids), ('state', 'in', OPEN_TASK_STATES)],
+            ['analytic_account_id'],
+            ['__count', 'total_hours:sum', 'expected_hours:sum'],
+        )
+        for store, count, total_hours, expected_hours in task_groups:
+            if store.id in data:
+                data[store.id]['open_tasks'] = count
+                data[store.id]['open_task_hours'] = total_hours or 0.0
+                data[store.id]['open_task_expected_hours'] = expected_hours or 0.0
+
+        timer_groups = self.env['tracker.timesheet'].sudo()._read_group(
+            [('analytic_account_id', 'in', store_ids), ('state', '=', 'running')],
+            ['analytic_account_id'],
+            ['__count'],
+        )
+        for store, count in timer_groups:
+            if store.id in data:
+                data[store.id]['running_timers'] = count
+
+        for store_id, values in data.items():
+            open_count, delay_sum = delay_totals[store_id]
+            values['avg_delay_days'] = round(delay_sum / open_count, 2) if open_count else 0.0
+            values['states'] = dict(values['states'])
+            values['overdue_buckets'] = dict(values['overdue_buckets'])
+        return data
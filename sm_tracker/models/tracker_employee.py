@@ -1,6 +1,18 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import models, fields, api, _, SUPERUSER_ID
+import logging
+
+from .tracker_operator_eligibility import ELIGIBILITY_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# PIN fallidos seguidos antes de bloquear al operario, y minutos de bloqueo
+MAX_PIN_ATTEMPTS = 5
+PIN_LOCKOUT_MINUTES = 5
 
 
 class HrEmployee(models.Model):
@@ -58,6 +70,27 @@ class HrEmployee(models.Model):
         help='[DEPRECADO] Usar los campos específicos por rol'
     )
     
+    tracker_eligibility_ids = fields.One2many(
+        'tracker.operator.eligibility',
+        'employee_id',
+        string='Elegibilidad como Operario',
+        help='Tiendas y servicios en los que puede ejecutar tareas (calculado)'
+    )
+    
+    tracker_pin_failed_attempts = fields.Integer(
+        string='PIN Fallidos',
+        readonly=True,
+        groups='hr.group_hr_user',
+        help='Intentos de PIN fallidos seguidos en el tracker'
+    )
+    
+    tracker_pin_locked_until = fields.Datetime(
+        string='PIN Bloqueado Hasta',
+        readonly=True,
+        groups='hr.group_hr_user',
+        help='El operario no puede validar su PIN en el tracker hasta esta hora'
+    )
+    
     is_tracker_manager = fields.Boolean(
         string='Es Gerente Regional',
         help='Los gerentes regionales pueden ver múltiples tiendas'
@@ -86,15 +119,65 @@ class HrEmployee(models.Model):
         help='Total de horas registradas en tracker'
     )
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super(HrEmployee, self).create(vals_list)
+        if any(vals.get('tracker_analytic_account_operario_ids') and vals.get('tracker_product_ids')
+               for vals in vals_list):
+            self.env['tracker.operator.eligibility']._rebuild(employees.ids)
+        return employees
+    
+    def write(self, vals):
+        res = super(HrEmployee, self).write(vals)
+        if any(fname in vals for fname in ELIGIBILITY_FIELDS):
+            self.env['tracker.operator.eligibility']._rebuild(self.ids)
+        return res
+    
+    def _register_pin_failure(self):
+        """Contar un PIN fallido y bloquear al llegar al máximo
+        
+        Se guarda con un cursor propio: la transacción del intento se revierte
+        al fallar la validación.
+        """
+        self.ensure_one()
+        with self.env.registry.cursor() as cr:
+            cr.execute("""
+                UPDATE hr_employee
+                   SET tracker_pin_failed_attempts = COALESCE(tracker_pin_failed_attempts, 0) + 1
+                 WHERE id = %s
+             RETURNING tracker_pin_failed_attempts
+            """, (self.id,))
+            attempts = cr.fetchone()[0]
+            if attempts >= MAX_PIN_ATTEMPTS:
+                employee = api.Environment(cr, SUPERUSER_ID, {})['hr.employee'].browse(self.id)
+                employee.write({
+                    'tracker_pin_failed_attempts': 0,
+                    'tracker_pin_locked_until': fields.Datetime.now() + timedelta(minutes=PIN_LOCKOUT_MINUTES),
+                })
+        _logger.warning('PIN incorrecto para el operario %s (id %s) desde el usuario %s: intento %d de %d',
+                        self.name, self.id, self.env.user.login, attempts, MAX_PIN_ATTEMPTS)
+        return attempts
+    
     @api.depends('tracker_task_ids')
     def _compute_tracker_task_count(self):
         for employee in self:
             employee.tracker_task_count = len(employee.tracker_task_ids)
     
-    @api.depends('tracker_timesheet_ids.hours')
     def _compute_tracker_total_hours(self):
+        """Horas cerradas desde el resumen diario más los registros aún abiertos"""
+        employee_ids = self._origin.ids
+        totals = defaultdict(float)
+        if employee_ids:
+            daily_groups = self.env['tracker.hours.daily']._read_group(
+                [('employee_id', 'in', employee_ids)], ['employee_id'], ['hours:sum'],
+            )
+            open_groups = self.env['tracker.timesheet']._read_group(
+                [('employee_id', 'in', employee_ids), ('end_time', '=', False)], ['employee_id'], ['hours:sum'],
+            )
+            for employee, hours in daily_groups + open_groups:
+                totals[employee.id] += hours or 0.0
         for employee in self:
-            employee.tracker_total_hours = sum(employee.tracker_timesheet_ids.mapped('hours'))
+            employee.tracker_total_hours = totals[employee._origin.id]
     
     def action_view_tracker_tasks(self):
         """Ver tareas asignadas al empleado"""
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TrackerHoursDaily(models.Model):
+    """Horas diarias por empleado, tienda y servicio.
+
+    Se mantiene de forma incremental cuando se cierra, corrige o borra un
+    registro de tiempo, para que totales, indicadores y exportaciones de
+    nómina lean pocas filas en lugar de todo el historial de tracker.timesheet.
+    Solo cuenta registros cerrados (con hora fin).
+    """
+    _name = 'tracker.hours.daily'
+    _description = 'Horas Diarias del Tracker'
+    _order = 'date desc, employee_id'
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Empleado',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string='Tienda',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Servicio',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    date = fields.Date(
+        string='Fecha',
+        required=True,
+        index=True,
+        readonly=True
+    )
+
+    hours = fields.Float(
+        string='Horas',
+        readonly=True
+    )
+
+    timesheet_count = fields.Integer(
+        string='# Registros',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('employee_store_product_date_uniq', 'unique(employee_id, analytic_account_id, product_id, date)',
+         'Solo puede existir un resumen diario por empleado, tienda, servicio y fecha.'),
+    ]
+
+    @api.model
+    def _apply_timesheets(self, timesheets, sign):
+        """Sumar (sign=1) o restar (sign=-1) las horas de registros cerrados"""
+        totals = defaultdict(lambda: [0.0, 0])
+        for timesheet in timesheets.filtered('end_time'):
+            key = (
+                timesheet.employee_id.id,
+                timesheet.analytic_account_id.id,
+                timesheet.task_id.product_id.id,
+                timesheet.date,
+            )
+            totals[key][0] += timesheet.hours * sign
+            totals[key][1] += sign
+        if not totals:
+            return
+
+        empty_ids = []
+        for (employee_id, analytic_id, product_id, date), (hours, count) in totals.items():
+            # Upsert: un solo statement por clave, sin leer la fila antes
+            self.env.cr.execute("""
+                INSERT INTO tracker_hours_daily
+                       (employee_id, analytic_account_id, product_id, date, hours, timesheet_count,
+                        create_uid, create_date, write_uid, write_date)
+                VALUES (%s, %s, %s, %s, %s, %s,
+                        %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+                ON CONFLICT (employee_id, analytic_account_id, product_id, date)
+                DO UPDATE SET hours = tracker_hours_daily.hours + EXCLUDED.hours,
+                              timesheet_count = tracker_hours_daily.timesheet_count + EXCLUDED.timesheet_count,
+                              write_uid = EXCLUDED.write_uid,
+                              write_date = EXCLUDED.write_date
+                RETURNING id, timesheet_count
+            """, (employee_id, analytic_id, product_id, date, hours, count, self.env.uid, self.env.uid))
+            row_id, row_count = self.env.cr.fetchone()
+            if row_count <= 0:
+                empty_ids.append(row_id)
+        # Solo las claves tocadas que se quedaron sin registros
+        if empty_ids:
+            self.env.cr.execute("DELETE FROM tracker_hours_daily WHERE id IN %s", (tuple(empty_ids),))
+        self.invalidate_model(['hours', 'timesheet_count'])
+
+    @api.model
+    def _add_timesheets(self, timesheets):
+        self._apply_timesheets(timesheets, 1)
+
+    @api.model
+    def _remove_timesheets(self, timesheets):
+        self._apply_timesheets(timesheets, -1)
+
+    @api.model
+    def _rebuild(self, date_from=None):
+        """Recalcular el resumen desde tracker.timesheet (todo, o desde date_from)"""
+        self.env['tracker.timesheet'].flush_model()
+        self.env['tracker.task'].flush_model(['product_id'])
+        where_date = "AND ts.date >= %(date_from)s" if date_from else ""
+        params = {'date_from': date_from, 'uid': self.env.uid}
+        self.env.cr.execute(
+            "DELETE FROM tracker_hours_daily WHERE %s" % ("date >= %(date_from)s" if date_from else "TRUE"),
+            params,
+        )
+        self.env.cr.execute("""
+            INSERT INTO tracker_hours_daily
+                   (employee_id, analytic_account_id, product_id, date, hours, timesheet_count,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT ts.employee_id, ts.analytic_account_id, t.product_id, ts.date,
+                   SUM(ts.hours), COUNT(*),
+                   %%(uid)s, now() at time zone 'UTC', %%(uid)s, now() at time zone 'UTC'
+              FROM tracker_timesheet ts
+              JOIN tracker_task t ON t.id = ts.task_id
+             WHERE ts.end_time IS NOT NULL
+               %s
+          GROUP BY ts.employee_id, ts.analytic_account_id, t.product_id, ts.date
+        """ % where_date, params)
+        self.invalidate_model()
+        _logger.info('Resumen diario de horas recalculado (%d filas)', self.env.cr.rowcount)
+
+    @api.model
+    def _cron_reconcile(self, days=7):
+        """Recalcular los últimos días por si hubo borrados en cascada o cambios por SQL"""
+        self._rebuild(fields.Date.context_today(self) - timedelta(days=days))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Campos del empleado que definen en qué tiendas y servicios puede trabajar
+ELIGIBILITY_FIELDS = ['tracker_analytic_account_operario_ids', 'tracker_product_ids', 'active']
+
+
+class TrackerOperatorEligibility(models.Model):
+    """Operarios que pueden ejecutar cada servicio en cada tienda.
+
+    Es el producto de las tiendas como operario por los servicios del
+    empleado, guardado como filas (empleado, tienda, servicio). Se regenera
+    en SQL al modificar esos campos del empleado, de modo que el dominio del
+    operario en la tarea, el kiosco y la asignación automática consultan un
+    solo índice en lugar de unir las tablas many2many.
+    """
+    _name = 'tracker.operator.eligibility'
+    _description = 'Operario Elegible por Tienda y Servicio'
+    _log_access = False
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Operario',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string='Tienda',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Servicio',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    _sql_constraints = [
+        # El índice único (tienda, servicio, operario) resuelve las búsquedas por tarea
+        ('store_product_employee_uniq', 'unique(analytic_account_id, product_id, employee_id)',
+         'El operario ya es elegible para este servicio en esta tienda.'),
+    ]
+
+    def init(self):
+        # Reconstrucción y limpieza por empleado
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS tracker_operator_eligibility_employee_index
+                ON tracker_operator_eligibility (employee_id)
+        """)
+
+    @api.model
+    def _rebuild(self, employee_ids=None):
+        """Regenerar las filas de los empleados dados (o de todos) en SQL"""
+        self.env['hr.employee'].flush_model(ELIGIBILITY_FIELDS)
+        params = {'all': employee_ids is None, 'ids': list(employee_ids or [])}
+        cr = self.env.cr
+        cr.execute("""
+            DELETE FROM tracker_operator_eligibility
+             WHERE %(all)s OR employee_id = ANY(%(ids)s)
+        """, params)
+        cr.execute("""
+            INSERT INTO tracker_operator_eligibility (employee_id, analytic_account_id, product_id)
+            SELECT e.id, s.analytic_account_id, p.product_id
+              FROM hr_employee e
+              JOIN hr_employee_analytic_operario_rel s ON s.employee_id = e.id
+              JOIN hr_employee_product_rel p ON p.employee_id = e.id
+             WHERE e.active
+               AND (%(all)s OR e.id = ANY(%(ids)s))
+            ON CONFLICT DO NOTHING
+        """, params)
+        self.invalidate_model()
+        _logger.debug('Elegibilidad de operarios regenerada: %d fila(s)', cr.rowcount)
+        return cr.rowcount
+
+    @api.model
+    def _get_eligible(self, store_ids, product_ids):
+        """Operarios por (tienda, servicio): {(store_id, product_id): [employee_id, ...]}"""
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT analytic_account_id, product_id, employee_id
+              FROM tracker_operator_eligibility
+             WHERE analytic_account_id = ANY(%s)
+               AND product_id = ANY(%s)
+          ORDER BY employee_id
+        """, (list(store_ids), list(product_ids)))
+        eligible = {}
+        for store_id, product_id, employee_id in self.env.cr.fetchall():
+            eligible.setdefault((store_id, product_id), []).append(employee_id)
+        return eligible
+
+    @api.model
+    def _is_eligible(self, employee_id, store_id, product_id):
+        # Sin operario, tienda o servicio no hay elegibilidad posible
+        if not (employee_id and store_id and product_id):
+            return False
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT 1
+              FROM tracker_operator_eligibility
+             WHERE analytic_account_id = %s
+               AND product_id = %s
+               AND employee_id = %s
+        """, (store_id, product_id, employee_id))
+        return bool(self.env.cr.fetchone())
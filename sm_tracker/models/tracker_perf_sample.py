@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.tools import str2bool
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Agregados en memoria por proceso: {(dbname, paso): [llamadas, segundos, máximo, consultas]}
+_samples = defaultdict(lambda: [0, 0.0, 0.0, 0])
+_samples_lock = threading.Lock()
+_last_flush = {}
+
+PERF_ENABLED_PARAM = 'sm_tracker.perf_enabled'
+PERF_FLUSH_INTERVAL_PARAM = 'sm_tracker.perf_flush_interval'
+
+
+def _perf_enabled(env):
+    # get_param está en caché (ormcache), no genera consultas en el camino caliente
+    return str2bool(env['ir.config_parameter'].sudo().get_param(PERF_ENABLED_PARAM, 'False'))
+
+
+@contextmanager
+def perf_step(env, name):
+    """Medir tiempo, consultas y llamadas de un paso si la instrumentación está activa"""
+    if not _perf_enabled(env):
+        yield
+        return
+
+    start = time.perf_counter()
+    start_queries = env.cr.sql_log_count
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        queries = env.cr.sql_log_count - start_queries
+        dbname = env.cr.dbname
+        with _samples_lock:
+            sample = _samples[(dbname, name)]
+            sample[0] += 1
+            sample[1] += elapsed
+            sample[2] = max(sample[2], elapsed)
+            sample[3] += queries
+        _maybe_flush(env)
+
+
+def tracker_perf(name):
+    """Decorador para instrumentar un método de modelo con perf_step"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with perf_step(self.env, name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _pop_samples(dbname):
+    with _samples_lock:
+        keys = [key for key in _samples if key[0] == dbname]
+        return {key[1]: _samples.pop(key) for key in keys}
+
+
+def _maybe_flush(env):
+    dbname = env.cr.dbname
+    interval = int(env['ir.config_parameter'].sudo().get_param(PERF_FLUSH_INTERVAL_PARAM, 60))
+    now = time.monotonic()
+    if now - _last_flush.setdefault(dbname, now) < interval:
+        return
+    _last_flush[dbname] = now
+    # Cursor propio: la escritura de muestras no debe depender de la transacción del POS
+    try:
+        with env.registry.cursor() as cr:
+            flush_env = api.Environment(cr, env.uid, env.context)
+            flush_env['tracker.perf.sample'].sudo()._flush_samples()
+    except Exception:
+        _logger.warning('No se pudieron guardar las muestras de rendimiento del tracker', exc_info=True)
+
+
+class TrackerPerfSample(models.Model):
+    _name = 'tracker.perf.sample'
+    _description = 'Muestra de Rendimiento del Tracker'
+    _order = 'date desc, id desc'
+
+    name = fields.Char(
+        string='Paso',
+        required=True,
+        index=True,
+        readonly=True
+    )
+
+    date = fields.Datetime(
+        string='Fecha',
+        required=True,
+        index=True,
+        readonly=True,
+        default=fields.Datetime.now
+    )
+
+    source = fields.Char(
+        string='Proceso',
+        readonly=True,
+        help='Servidor y PID del proceso que tomó la muestra'
+    )
+
+    call_count = fields.Integer(
+        string='Llamadas',
+        readonly=True
+    )
+
+    total_ms = fields.Float(
+        string='Tiempo Total (ms)',
+        readonly=True
+    )
+
+    avg_ms = fields.Float(
+        string='Tiempo Promedio (ms)',
+        group_operator='avg',
+        readonly=True
+    )
+
+    max_ms = fields.Float(
+        string='Tiempo Máximo (ms)',
+        group_operator='max',
+        readonly=True
+    )
+
+    query_count = fields.Integer(
+        string='Consultas',
+        readonly=True
+    )
+
+    @api.model
+    def _flush_samples(self):
+        """Guardar y reiniciar los agregados en memoria de este proceso"""
+        samples = _pop_samples(self.env.cr.dbname)
+        if not samples:
+            return self.browse()
+
+        source = '%s:%s' % (socket.gethostname(), os.getpid())
+        vals_list = []
+        for name, (count, total, maximum, queries) in samples.items():
+            vals_list.append({
+                'name': name,
+                'source': source,
+                'call_count': count,
+                'total_ms': total * 1000.0,
+                'avg_ms': (total * 1000.0 / count) if count else 0.0,
+                'max_ms': maximum * 1000.0,
+                'query_count': queries,
+            })
+        return self.create(vals_list)
+
+    @api.autovacuum
+    def _gc_old_samples(self):
+        """Borrar muestras de más de 30 días"""
+        limit_date = fields.Datetime.now() - timedelta(days=30)
+        self.search([('date', '<', limit_date)]).unlink()
@@ -2,7 +2,16 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import create_index
+from collections import defaultdict
 from datetime import datetime, timedelta
+import io
+import logging
+import zipfile
+
+from .tracker_task_scheduler import DEFAULT_TASK_HOURS, QUEUED_STATES
+
+_logger = logging.getLogger(__name__)
 
 
 class TrackerProject(models.Model):
@@ -23,6 +32,7 @@ class TrackerProject(models.Model):
     sale_order_id = fields.Many2one(
         'sale.order',
         string='Orden de Venta',
+        index=True,
         tracking=True,
         readonly=True,
         help='Orden de venta origen del proyecto'
@@ -31,6 +41,7 @@ class TrackerProject(models.Model):
     pos_order_id = fields.Many2one(
         'pos.order',
         string='Orden POS',
+        index=True,
         tracking=True,
         readonly=True,
         help='Orden del punto de venta origen del proyecto'
@@ -77,11 +88,19 @@ class TrackerProject(models.Model):
     
     promise_date = fields.Datetime(
         string='Fecha Prometida',
+        index=True,
         required=False,
         tracking=True,
         help='Fecha y hora en que se prometió la entrega al cliente'
     )
     
+    suggested_promise_date = fields.Datetime(
+        string='Fecha Prometida Sugerida',
+        compute='_compute_suggested_promise_date',
+        help='Estimada con la duración histórica (P90) de los servicios en la tienda '
+             'y la cola actual de la tienda, en horario laboral'
+    )
+    
     delivery_date = fields.Datetime(
         string='Fecha de Entrega',
         tracking=True,
@@ -102,7 +121,7 @@ class TrackerProject(models.Model):
         ('pending_delivery', 'Pendiente de Entrega'),
         ('cancel', 'Anulado'),
         ('delivered', 'Entregado'),
-    ], string='Estado', default='pending', required=True, tracking=True)
+    ], string='Estado', default='pending', required=True, tracking=True, index=True)
     
     state_sequence = fields.Integer(
         string='Secuencia de Estado',
@@ -138,6 +157,12 @@ class TrackerProject(models.Model):
         help='Movimientos de inventario pendientes (no done ni cancel)'
     )
     
+    pending_stock_move_count = fields.Integer(
+        string='Productos Pendientes',
+        compute='_compute_pending_stock_moves',
+        help='Cantidad de movimientos pendientes de compra (confirmados y sin BoM)'
+    )
+    
     has_waiting_stock = fields.Boolean(
         string='Tiene productos en espera',
         compute='_compute_has_waiting_stock',
@@ -165,6 +190,18 @@ class TrackerProject(models.Model):
         help='Días de diferencia entre fecha prometida y entregada'
     )
     
+    overdue_bucket = fields.Selection([
+        ('on_time', 'A Tiempo'),
+        ('1_day', '1 Día'),
+        ('2_3_days', '2-3 Días'),
+        ('4_plus_days', '4+ Días'),
+    ], string='Rango de Retraso',
+        compute='_compute_overdue_bucket',
+        store=True,
+        index=True,
+        help='Rango de días de retraso, actualizado por el cron de retrasos'
+    )
+    
     hours_unassigned_stored = fields.Float(
         string='Horas sin Asignar (Guardado)',
         default=0.0,
@@ -172,6 +209,13 @@ class TrackerProject(models.Model):
         help='Valor guardado de horas sin asignar cuando se inició el trabajo'
     )
     
+    promise_date_assigned_at = fields.Datetime(
+        string='Fecha Asignación Promesa',
+        readonly=True,
+        copy=False,
+        help='Momento en que se asignó por primera vez la fecha prometida'
+    )
+    
     hours_unassigned = fields.Float(
         string='Horas sin Asignar',
         compute='_compute_hours_unassigned',
@@ -200,17 +244,30 @@ class TrackerProject(models.Model):
     
     notes = fields.Text(string='Notas')
     
+    service_category_ids = fields.Many2many(
+        'tracker.service.category',
+        'tracker_project_service_category_rel',
+        'project_id',
+        'category_id',
+        string='Categorías de Servicio',
+        compute='_compute_service_categories',
+        store=True,
+        help='Categorías de los servicios de las tareas del proyecto'
+    )
+    
     is_despacho_host = fields.Boolean(
         string='Despacho Host',
-        compute='_compute_is_despacho_host',
+        compute='_compute_service_categories',
         store=True,
+        index=True,
         help='Indica si el proyecto contiene servicios de despacho host'
     )
     
     is_cnc = fields.Boolean(
         string='CNC',
-        compute='_compute_is_cnc',
+        compute='_compute_service_categories',
         store=True,
+        index=True,
         help='Indica si el proyecto contiene servicios de CNC'
     )
     
@@ -233,10 +290,11 @@ class TrackerProject(models.Model):
         help='Razón del último cambio de tienda'
     )
     
-    store_change_history = fields.Text(
+    store_change_ids = fields.One2many(
+        'tracker.project.store.change',
+        'project_id',
         string='Historial de Cambios de Tienda',
-        readonly=True,
-        help='Historial completo de cambios de tienda'
+        readonly=True
     )
     
     state_changed_by = fields.Many2one(
@@ -250,11 +308,89 @@ class TrackerProject(models.Model):
         readonly=True
     )
     
+    def init(self):
+        """Índices compuestos para los filtros más usados del tracker"""
+        # Kanban/lista por tienda agrupada por estado y ordenada por fecha prometida
+        create_index(self._cr, 'tracker_project_store_state_promise_index', self._table, ['analytic_account_id', 'state', 'promise_date'])
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        unnamed = [vals for vals in vals_list if vals.get('name', 'Nuevo') == 'Nuevo']
+        for vals, name in zip(unnamed, self._reserve_names(len(unnamed))):
+            vals['name'] = name
+        for vals in vals_list:
+            if vals.get('promise_date') and not vals.get('promise_date_assigned_at'):
+                vals['promise_date_assigned_at'] = fields.Datetime.now()
+        return super(TrackerProject, self).create(vals_list)
+    
     @api.model
-    def create(self, vals):
-        if vals.get('name', 'Nuevo') == 'Nuevo':
-            vals['name'] = self.env['ir.sequence'].next_by_code('tracker.project') or 'Nuevo'
-        return super(TrackerProject, self).create(vals)
+    def _reserve_names(self, count):
+        """Reservar count referencias de la secuencia tracker.project
+        
+        Con la implementación estándar (secuencia de PostgreSQL) se reservan
+        todos los números con una sola consulta; en otro caso se usa
+        next_by_code uno por uno.
+        """
+        if not count:
+            return []
+        Sequence = self.env['ir.sequence'].sudo()
+        # Misma selección que next_by_code: primero la de la compañía, luego la global
+        sequence = Sequence.search([
+            ('code', '=', 'tracker.project'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence or sequence.implementation != 'standard' or sequence.use_date_range:
+            return [Sequence.next_by_code('tracker.project') or 'Nuevo' for i in range(count)]
+        
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ('ir_sequence_%03d' % sequence.id, count),
+        )
+        return [sequence.get_next_char(row[0]) for row in self.env.cr.fetchall()]
+    
+    @api.model
+    def _create_from_orders(self, entries):
+        """Crear proyectos, tareas y faltantes de varias órdenes en una sola pasada
+        
+        entries es una lista de dicts con order_field ('sale_order_id' o
+        'pos_order_id'), order, partner, analytic_account, services
+        ({producto: cantidad}) y moves (movimientos pendientes para el abasto).
+        Hace un create() de proyectos y uno de tareas para todas las órdenes.
+        Devuelve {order_id: proyecto}.
+        """
+        if not entries:
+            return {}
+        
+        projects = self.create([{
+            entry['order_field']: entry['order'].id,
+            'partner_id': entry['partner'].id,
+            'analytic_account_id': entry['analytic_account'].id,
+            # user_id se deja vacío intencionalmente - se asignará antes de entregar
+        } for entry in entries])
+        
+        task_vals_list = []
+        for entry, project in zip(entries, projects):
+            if not entry['services']:
+                _logger.warning('No se encontraron servicios en la orden %s', entry['order'].name)
+            for product, qty in entry['services'].items():
+                task_vals_list.append({
+                    'project_id': project.id,
+                    'product_id': product.id,
+                    'name': product.name,
+                    'quantity': qty,
+                    'analytic_account_id': entry['analytic_account'].id,
+                })
+        if task_vals_list:
+            self.env['tracker.task'].create(task_vals_list)
+        
+        # Calcular abasto basado en almacén de la tienda (solo proyectos con servicios)
+        self.env['tracker.stock.shortage']._sync_projects_shortage([
+            (project, entry['analytic_account'], entry['moves'])
+            for entry, project in zip(entries, projects) if entry['services']
+        ])
+        
+        _logger.info('%d proyecto(s) tracker creados con %d tarea(s)', len(projects), len(task_vals_list))
+        return {entry['order'].id: project for entry, project in zip(entries, projects)}
     
     @api.onchange('promise_date')
     def _onchange_promise_date(self):
@@ -412,80 +548,258 @@ class TrackerProject(models.Model):
             else:
                 record.delay_days = 0
     
-    @api.depends('promise_date', 'task_ids.state', 'hours_unassigned_stored')
+    @api.depends('delay_days')
+    def _compute_overdue_bucket(self):
+        for record in self:
+            record.overdue_bucket = self._get_overdue_bucket(record.delay_days)
+    
+    @api.model
+    def _get_overdue_bucket(self, delay_days):
+        """Rango de retraso para una cantidad de días (mismo criterio que el cron en SQL)"""
+        if delay_days <= 0:
+            return 'on_time'
+        if delay_days == 1:
+            return '1_day'
+        if delay_days <= 3:
+            return '2_3_days'
+        return '4_plus_days'
+    
+    @api.depends('state', 'analytic_account_id', 'task_ids.product_id', 'task_ids.quantity_remaining')
+    def _compute_suggested_promise_date(self):
+        """Sugerir la fecha prometida de los proyectos pendientes
+        
+        Por cada servicio del proyecto: horas en cola de ese servicio en la
+        tienda repartidas entre sus operarios, más las horas P90 del proyecto.
+        La fecha es la del servicio que termina último.
+        """
+        projects = self.filtered(lambda p: p.state == 'pending' and p.analytic_account_id and p.task_ids)
+        (self - projects).suggested_promise_date = False
+        if not projects:
+            return
+        
+        Scheduler = self.env['tracker.task.scheduler']
+        open_tasks = projects.task_ids.filtered(lambda t: t.state not in ['done', 'cancel'])
+        store_ids = set(projects.analytic_account_id.ids)
+        product_ids = set(open_tasks.product_id.ids)
+        
+        # Cola abierta de las tiendas por servicio, sin las tareas de estos proyectos
+        queued = self.env['tracker.task'].sudo().search([
+            ('analytic_account_id', 'in', list(store_ids)),
+            ('product_id', 'in', list(product_ids)),
+            ('state', 'in', QUEUED_STATES),
+            ('project_id', 'not in', projects.ids),
+        ])
+        queued_estimates = Scheduler._estimate_hours(queued)
+        queue_hours = defaultdict(float)
+        for task in queued:
+            queue_hours[(task.analytic_account_id.id, task.product_id.id)] += queued_estimates[task.id]
+        eligible = Scheduler._get_eligible_employees(store_ids, product_ids)
+        hours_p90 = self.env['tracker.service.duration.stat']._get_hours_per_unit(open_tasks, 'hours_p90')
+        
+        now = fields.Datetime.now()
+        for project in projects:
+            hours_needed = 0.0
+            for task in open_tasks.filtered(lambda t: t.project_id == project):
+                key = (task.analytic_account_id.id, task.product_id.id)
+                operators = len(eligible.get(key, [])) or 1
+                if task.id in hours_p90:
+                    own_hours = hours_p90[task.id] * (task.quantity_remaining or task.quantity)
+                else:
+                    own_hours = task.expected_hours or DEFAULT_TASK_HOURS
+                hours_needed = max(hours_needed, queue_hours[key] / operators + own_hours)
+            
+            calendar = project.company_id.resource_calendar_id
+            suggested = calendar.plan_hours(hours_needed, now) if calendar and hours_needed else False
+            project.suggested_promise_date = suggested or now + timedelta(hours=hours_needed)
+    
+    def action_apply_suggested_promise_date(self):
+        """Usar la fecha sugerida como fecha prometida"""
+        for record in self:
+            if record.state != 'pending':
+                raise UserError(_('Solo se puede asignar la fecha prometida a un proyecto pendiente.'))
+            if record.suggested_promise_date:
+                record.promise_date = record.suggested_promise_date
+        return True
+    
+    @api.model
+    def _cron_update_delay_days(self):
+        """Recalcular días de retraso y rango de todos los proyectos no entregados en un solo UPDATE
+        
+        delay_days es un campo guardado que depende de la hora actual, así que sin este
+        cron se queda con el valor del último write.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            WITH delays AS (
+                SELECT id,
+                       CASE WHEN promise_date IS NOT NULL AND promise_date < %(now)s
+                            THEN FLOOR(EXTRACT(EPOCH FROM (%(now)s - promise_date)) / 86400)::integer
+                            ELSE 0
+                       END AS days
+                  FROM tracker_project
+                 WHERE state != 'delivered'
+            )
+            UPDATE tracker_project p
+               SET delay_days = d.days,
+                   overdue_bucket = CASE WHEN d.days <= 0 THEN 'on_time'
+                                         WHEN d.days = 1 THEN '1_day'
+                                         WHEN d.days <= 3 THEN '2_3_days'
+                                         ELSE '4_plus_days'
+                                    END
+              FROM delays d
+             WHERE p.id = d.id
+               AND (p.delay_days IS DISTINCT FROM d.days OR p.overdue_bucket IS NULL
+                    OR p.overdue_bucket != CASE WHEN d.days <= 0 THEN 'on_time'
+                                                WHEN d.days = 1 THEN '1_day'
+                                                WHEN d.days <= 3 THEN '2_3_days'
+                                                ELSE '4_plus_days'
+                                           END)
+        """, {'now': fields.Datetime.now()})
+        _logger.debug('Retraso actualizado en %d proyecto(s)', self.env.cr.rowcount)
+        self.invalidate_model(['delay_days', 'overdue_bucket'])
+        return True
+    
+    @api.depends('promise_date', 'promise_date_assigned_at', 'hours_unassigned_stored')
     def _compute_hours_unassigned(self):
-        """Calcular horas desde asignación de fecha promesa hasta inicio de trabajo"""
+        """Calcular horas desde asignación de fecha promesa hasta inicio de trabajo
+        
+        El valor final se congela en hours_unassigned_stored al iniciar la primera
+        tarea (ver _freeze_hours_unassigned); mientras tanto se calcula contra la hora actual.
+        """
+        now = fields.Datetime.now()
         for record in self:
             # Si ya tiene un valor guardado, usar ese
             if record.hours_unassigned_stored > 0:
                 record.hours_unassigned = record.hours_unassigned_stored
-                continue
-            
-            # Si NO tiene fecha promesa → 0
-            if not record.promise_date:
+            elif record.promise_date and record.promise_date_assigned_at:
+                delta = now - record.promise_date_assigned_at
+                record.hours_unassigned = delta.total_seconds() / 3600.0
+            else:
                 record.hours_unassigned = 0.0
-                continue
-            
-            # Verificar si alguna tarea ya está iniciada
-            has_started_tasks = any(task.state != 'pending' for task in record.task_ids)
+    
+    def _check_all_tasks_done(self):
+        """Pasar a 'pending_delivery' los proyectos en proceso con todas sus tareas terminadas"""
+        completed = self.env['tracker.project']
+        for project in self.filtered(lambda p: p.state == 'processing'):
+            # Obtener solo tareas con estado válido (no NULL, no cancel)
+            valid_tasks = project.task_ids.filtered(
+                lambda t: t.state and t.state != 'cancel'
+            )
             
-            # Si ya inició tareas, calcular y guardar el valor final
-            if has_started_tasks:
-                # Buscar en el tracking cuando se asignó promise_date
-                tracking = self.env['mail.message'].search([
-                    ('model', '=', 'tracker.project'),
-                    ('res_id', '=', record.id),
-                    ('tracking_value_ids', '!=', False)
-                ], order='date asc')
-                
-                promise_date_assigned_at = None
-                for message in tracking:
-                    for tracking_value in message.tracking_value_ids:
-                        if tracking_value.field_id.name == 'promise_date' and tracking_value.new_value_char:
-                            promise_date_assigned_at = message.date
-                            break
-                    if promise_date_assigned_at:
-                        break
-                
-                # Buscar cuando se inició la primera tarea
-                first_task_started_at = None
-                for task in record.task_ids.sorted('start_date'):
-                    if task.start_date:
-                        first_task_started_at = task.start_date
-                        break
-                
-                # Calcular y guardar
-                if promise_date_assigned_at and first_task_started_at:
-                    delta = first_task_started_at - promise_date_assigned_at
-                    final_hours = delta.total_seconds() / 3600.0
-                    record.sudo().write({'hours_unassigned_stored': final_hours})
-                    record.hours_unassigned = final_hours
-                else:
-                    record.hours_unassigned = 0.0
-            else:
-                # Si NO ha iniciado tareas → calcular en tiempo real
-                tracking = self.env['mail.message'].search([
-                    ('model', '=', 'tracker.project'),
-                    ('res_id', '=', record.id),
-                    ('tracking_value_ids', '!=', False)
-                ], order='date asc')
-                
-                promise_date_assigned_at = None
-                for message in tracking:
-                    for tracking_value in message.tracking_value_ids:
-                        if tracking_value.field_id.name == 'promise_date' and tracking_value.new_value_char:
-                            promise_date_assigned_at = message.date
-                            break
-                    if promise_date_assigned_at:
-                        break
-                
-                # Calcular tiempo transcurrido hasta ahora
-                if promise_date_assigned_at:
-                    now = fields.Datetime.now()
-                    delta = now - promise_date_assigned_at
-                    record.hours_unassigned = delta.total_seconds() / 3600.0
-                else:
-                    record.hours_unassigned = 0.0
+            # Si hay tareas válidas y todas están terminadas
+            if valid_tasks and all(t.state == 'done' for t in valid_tasks):
+                completed |= project
+        
+        if completed:
+            completed.write({
+                'state': 'pending_delivery',
+                'completion_date': fields.Datetime.now()
+            })
+        return completed
+    
+    def _change_store(self, new_store, reason):
+        """Mover los proyectos y sus tareas a otra tienda, registrando cada cambio
+        
+        Pensado para cientos de proyectos (p. ej. cierre de sucursal): una
+        escritura por tienda de origen, una para todas las tareas y un create()
+        para el historial. Los proyectos entregados o anulados no se mueven.
+        """
+        closed = self.filtered(lambda p: p.state in ['delivered', 'cancel'])
+        if closed:
+            raise UserError(_(
+                'No se puede cambiar la tienda de proyectos entregados o anulados: %s'
+            ) % ', '.join(closed.mapped('name')))
+        
+        projects = self.filtered(lambda p: p.analytic_account_id != new_store)
+        if not projects:
+            return projects
+        
+        task_counts = {
+            project.id: count for project, count in self.env['tracker.task']._read_group(
+                [('project_id', 'in', projects.ids)], ['project_id'], ['__count'],
+            )
+        }
+        self.env['tracker.project.store.change'].create([{
+            'project_id': project.id,
+            'old_store_id': project.analytic_account_id.id,
+            'new_store_id': new_store.id,
+            'reason': reason,
+            'task_count': task_counts.get(project.id, 0),
+        } for project in projects])
+        
+        for old_store in projects.analytic_account_id:
+            projects.filtered(lambda p: p.analytic_account_id == old_store).write({
+                'analytic_account_id': new_store.id,
+                'previous_analytic_account_id': old_store.id,
+                'store_change_reason': reason,
+            })
+        projects_without_store = projects.filtered(lambda p: not p.analytic_account_id)
+        if projects_without_store:
+            projects_without_store.write({
+                'analytic_account_id': new_store.id,
+                'store_change_reason': reason,
+            })
+        
+        # Actualizar la tienda de todas las tareas de los proyectos
+        projects.task_ids.write({
+            'analytic_account_id': new_store.id
+        })
+        return projects
+    
+    def _freeze_hours_unassigned(self, start_time):
+        """Guardar las horas sin asignar al iniciar la primera tarea del proyecto"""
+        for record in self:
+            if record.hours_unassigned_stored > 0 or not record.promise_date_assigned_at:
+                continue
+            delta = start_time - record.promise_date_assigned_at
+            record.sudo().write({'hours_unassigned_stored': delta.total_seconds() / 3600.0})
+    
+    @api.model
+    def _backfill_promise_date_assigned_at(self):
+        """Llenar promise_date_assigned_at desde el tracking de mensajes (una sola vez, en SQL)
+        
+        También congela hours_unassigned_stored de los proyectos que ya iniciaron
+        trabajo, usando el primer registro de tiempo de sus tareas.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            UPDATE tracker_project p
+               SET promise_date_assigned_at = t.assigned_at
+              FROM (
+                    SELECT m.res_id, MIN(m.date) AS assigned_at
+                      FROM mail_message m
+                      JOIN mail_tracking_value v ON v.mail_message_id = m.id
+                      JOIN ir_model_fields f ON f.id = v.field_id
+                     WHERE m.model = 'tracker.project'
+                       AND f.model = 'tracker.project'
+                       AND f.name = 'promise_date'
+                       AND (v.new_value_datetime IS NOT NULL OR COALESCE(v.new_value_char, '') != '')
+                  GROUP BY m.res_id
+                   ) t
+             WHERE p.id = t.res_id
+               AND p.promise_date IS NOT NULL
+               AND p.promise_date_assigned_at IS NULL
+        """)
+        assigned = self.env.cr.rowcount
+        self.env.cr.execute("""
+            UPDATE tracker_project p
+               SET hours_unassigned_stored = EXTRACT(EPOCH FROM (s.first_start - p.promise_date_assigned_at)) / 3600.0
+              FROM (
+                    SELECT task.project_id, MIN(ts.start_time) AS first_start
+                      FROM tracker_timesheet ts
+                      JOIN tracker_task task ON task.id = ts.task_id
+                     WHERE ts.start_time IS NOT NULL
+                  GROUP BY task.project_id
+                   ) s
+             WHERE p.id = s.project_id
+               AND p.promise_date_assigned_at IS NOT NULL
+               AND COALESCE(p.hours_unassigned_stored, 0) <= 0
+        """)
+        frozen = self.env.cr.rowcount
+        self.invalidate_model(['promise_date_assigned_at', 'hours_unassigned_stored'])
+        _logger.info('Backfill tracker: %d proyecto(s) con fecha de asignación, %d con horas congeladas',
+                     assigned, frozen)
+        return True
     
     @api.depends('task_ids.state')
     def _compute_progress(self):
@@ -533,102 +847,184 @@ class TrackerProject(models.Model):
             else:
                 record.origen_type = 'Manual'
     
+    def _get_order_moves_by_project(self, domain):
+        """Buscar los movimientos de los pickings de las órdenes origen de todo el recordset
+        
+        Hace una sola búsqueda de stock.move y devuelve {project_id: movimientos}.
+        La orden de venta tiene prioridad sobre la orden POS, como en los computes.
+        """
+        Move = self.env['stock.move']
+        result = {record.id: Move for record in self}
+        sale_ids = self.sale_order_id.ids
+        pos_ids = self.pos_order_id.ids
+        if not sale_ids and not pos_ids:
+            return result
+        
+        domain = list(domain) + [('package_level_id', '=', False)]
+        if sale_ids and pos_ids:
+            domain += ['|', ('picking_id.sale_id', 'in', sale_ids), ('picking_id.pos_order_id', 'in', pos_ids)]
+        elif sale_ids:
+            domain += [('picking_id.sale_id', 'in', sale_ids)]
+        else:
+            domain += [('picking_id.pos_order_id', 'in', pos_ids)]
+        
+        moves_by_sale = defaultdict(lambda: Move)
+        moves_by_pos = defaultdict(lambda: Move)
+        for move in Move.sudo().search(domain):
+            if move.picking_id.sale_id:
+                moves_by_sale[move.picking_id.sale_id.id] |= move
+            if move.picking_id.pos_order_id:
+                moves_by_pos[move.picking_id.pos_order_id.id] |= move
+        
+        for record in self:
+            if record.sale_order_id:
+                result[record.id] = moves_by_sale[record.sale_order_id.id]
+            elif record.pos_order_id:
+                result[record.id] = moves_by_pos[record.pos_order_id.id]
+        return result
+    
     @api.depends('sale_order_id', 'sale_order_id.picking_ids', 'pos_order_id', 'pos_order_id.picking_ids')
     def _compute_pending_stock_moves(self):
         """Obtener movimientos en estado 'confirmed' (En espera de disponibilidad) sin BoM
-        Solo productos que se COMPRAN, no los que se FABRICAN"""
+        Solo productos que se COMPRAN, no los que se FABRICAN
+        
+        Una búsqueda de movimientos y una de BoMs para todo el recordset, así la
+        columna de la lista no consulta por proyecto."""
+        moves_by_project = self._get_order_moves_by_project([('state', '=', 'confirmed')])
+        
+        # Plantillas con lista de materiales, en una sola consulta agrupada
+        templates = self.env['product.template']
+        for moves in moves_by_project.values():
+            templates |= moves.product_id.product_tmpl_id
+        bom_tmpl_ids = set()
+        if templates:
+            bom_tmpl_ids = {
+                template.id for template, count in self.env['mrp.bom'].sudo()._read_group(
+                    [('product_tmpl_id', 'in', templates.ids)], ['product_tmpl_id'], ['__count'],
+                )
+            }
+        
         for record in self:
-            pending_moves = self.env['stock.move']
-            
-            # Obtener pickings de la venta
-            if record.sale_order_id:
-                pickings = record.sale_order_id.picking_ids
-            # Obtener pickings del POS
-            elif record.pos_order_id:
-                pickings = record.pos_order_id.picking_ids
-            else:
-                pickings = self.env['stock.picking']
-            
-            # Filtrar movimientos en confirmed sin lista de materiales
-            if pickings:
-                for picking in pickings:
-                    # Solo productos en estado 'confirmed' y sin BoM (lista de materiales)
-                    moves = picking.move_ids_without_package.filtered(
-                        lambda m: m.state == 'confirmed' and 
-                        not m.product_id.product_tmpl_id.bom_ids
-                    )
-                    pending_moves |= moves
-            
+            pending_moves = moves_by_project[record.id].filtered(
+                lambda m: m.product_id.product_tmpl_id.id not in bom_tmpl_ids
+            )
             record.pending_stock_move_ids = pending_moves
+            record.pending_stock_move_count = len(pending_moves)
     
-    @api.depends('sale_order_id', 'sale_order_id.picking_ids', 'sale_order_id.picking_ids.move_ids_without_package',
-                 'sale_order_id.picking_ids.move_ids_without_package.state',
-                 'pos_order_id', 'pos_order_id.picking_ids', 'pos_order_id.picking_ids.move_ids_without_package',
-                 'pos_order_id.picking_ids.move_ids_without_package.state')
+    @api.depends('sale_order_id', 'pos_order_id')
     def _compute_has_waiting_stock(self):
-        """Verificar si hay movimientos en estado waiting (esperando disponibilidad)"""
+        """Verificar si hay movimientos en estado waiting (esperando disponibilidad)
+        
+        No depende de los movimientos: stock.move marca los proyectos afectados
+        (ver _mark_waiting_stock_to_recompute) y el cálculo se hace una vez por
+        proyecto con una sola búsqueda de movimientos para todo el recordset.
+        """
+        moves_by_project = self._get_order_moves_by_project([('state', '=', 'waiting')])
         for record in self:
-            has_waiting = False
-            
-            # Obtener pickings de la venta o POS
-            if record.sale_order_id:
-                pickings = record.sale_order_id.picking_ids
-            elif record.pos_order_id:
-                pickings = record.pos_order_id.picking_ids
-            else:
-                pickings = self.env['stock.picking']
-            
-            # Verificar si hay algún movimiento en estado waiting
-            if pickings:
-                for picking in pickings:
-                    waiting_moves = picking.move_ids_without_package.filtered(
-                        lambda m: m.state == 'waiting'
-                    )
-                    if waiting_moves:
-                        has_waiting = True
-                        break
-            
-            record.has_waiting_stock = has_waiting
+            record.has_waiting_stock = bool(moves_by_project[record.id])
     
-    @api.depends('task_ids.product_id')
-    def _compute_is_despacho_host(self):
-        """Determinar si el proyecto contiene servicios de despacho host"""
-        # Códigos de referencia interna de los servicios de despacho host
-        DESPACHO_HOST_CODES = [
-            'CORTES',
-            'CORTESEXTERNOS', 
-            'PEGADOCANTO',
-            'PEGADOCANTO2',
-            'PEGADOCANTOEXTERNO',
-            'S-024'
-        ]
+    @api.model
+    def _mark_waiting_stock_to_recompute(self, pickings):
+        """Marcar para recálculo solo los proyectos de las órdenes de esos pickings
         
-        for record in self:
-            is_despacho = False
-            
-            # Verificar si alguna tarea tiene un producto con esos códigos
-            for task in record.task_ids:
-                if task.product_id and task.product_id.default_code in DESPACHO_HOST_CODES:
-                    is_despacho = True
-                    break
-            
-            record.is_despacho_host = is_despacho
+        El recálculo lo hace el ORM al hacer flush, una vez por proyecto y transacción.
+        """
+        sale_ids = pickings.sale_id.ids
+        pos_ids = pickings.pos_order_id.ids
+        if not sale_ids and not pos_ids:
+            return self.browse()
+        projects = self.sudo().search([
+            '|', ('sale_order_id', 'in', sale_ids), ('pos_order_id', 'in', pos_ids),
+        ])
+        if projects:
+            self.env.add_to_compute(self._fields['has_waiting_stock'], projects)
+        return projects
     
     @api.depends('task_ids.product_id')
-    def _compute_is_cnc(self):
-        """Determinar si el proyecto contiene servicios de CNC"""
+    def _compute_service_categories(self):
+        """Categorías de servicio del proyecto y banderas CNC / despacho host
+        
+        Las banderas salen de la configuración de cada categoría. Cuando cambia
+        la categoría de un servicio, _sync_service_categories recalcula los
+        proyectos afectados en SQL.
+        """
         for record in self:
-            is_cnc = False
-            
-            # Verificar si alguna tarea tiene un producto que contenga "CNC" en el nombre
-            for task in record.task_ids:
-                if task.product_id and task.product_id.name and 'CNC' in task.product_id.name.upper():
-                    is_cnc = True
-                    break
-            
-            record.is_cnc = is_cnc
+            categories = record.task_ids.product_id.tracker_service_category_id
+            record.service_category_ids = categories
+            record.is_cnc = any(categories.mapped('is_cnc'))
+            record.is_despacho_host = any(categories.mapped('is_despacho_host'))
+    
+    @api.model
+    def _sync_service_categories(self, project_ids=None, product_ids=None, category_ids=None):
+        """Recalcular en SQL las categorías y banderas de los proyectos afectados
+        
+        Sin argumentos recalcula todo el historial. Solo se actualizan las filas
+        cuyas banderas cambian.
+        """
+        self.env['tracker.task'].flush_model(['project_id', 'product_id'])
+        self.env['product.product'].flush_model(['tracker_service_category_id'])
+        self.env['tracker.service.category'].flush_model(['is_cnc', 'is_despacho_host'])
+        self.flush_model(['service_category_ids', 'is_cnc', 'is_despacho_host'])
+        cr = self.env.cr
+        
+        if product_ids is not None:
+            cr.execute("""
+                SELECT DISTINCT project_id FROM tracker_task WHERE product_id = ANY(%s)
+            """, [list(product_ids)])
+            project_ids = [row[0] for row in cr.fetchall()]
+        elif category_ids is not None:
+            cr.execute("""
+                SELECT DISTINCT project_id FROM tracker_project_service_category_rel
+                 WHERE category_id = ANY(%s)
+            """, [list(category_ids)])
+            project_ids = [row[0] for row in cr.fetchall()]
+        if project_ids is not None and not project_ids:
+            return 0
+        
+        # Sin lista de proyectos: todo el historial
+        params = {'all': project_ids is None, 'ids': list(project_ids or [])}
+        cr.execute("""
+            DELETE FROM tracker_project_service_category_rel
+             WHERE %(all)s OR project_id = ANY(%(ids)s)
+        """, params)
+        cr.execute("""
+            INSERT INTO tracker_project_service_category_rel (project_id, category_id)
+            SELECT DISTINCT t.project_id, pp.tracker_service_category_id
+              FROM tracker_task t
+              JOIN product_product pp ON pp.id = t.product_id
+             WHERE pp.tracker_service_category_id IS NOT NULL
+               AND (%(all)s OR t.project_id = ANY(%(ids)s))
+        """, params)
+        cr.execute("""
+            UPDATE tracker_project p
+               SET is_cnc = COALESCE(f.is_cnc, FALSE),
+                   is_despacho_host = COALESCE(f.is_despacho_host, FALSE)
+              FROM tracker_project p2
+         LEFT JOIN (
+                    SELECT r.project_id,
+                           bool_or(c.is_cnc) AS is_cnc,
+                           bool_or(c.is_despacho_host) AS is_despacho_host
+                      FROM tracker_project_service_category_rel r
+                      JOIN tracker_service_category c ON c.id = r.category_id
+                  GROUP BY r.project_id
+                   ) f ON f.project_id = p2.id
+             WHERE p.id = p2.id
+               AND (%(all)s OR p.id = ANY(%(ids)s))
+               AND (p.is_cnc IS DISTINCT FROM COALESCE(f.is_cnc, FALSE)
+                    OR p.is_despacho_host IS DISTINCT FROM COALESCE(f.is_despacho_host, FALSE))
+        """, params)
+        updated = cr.rowcount
+        self.invalidate_model(['service_category_ids', 'is_cnc', 'is_despacho_host'])
+        _logger.info('Categorías de servicio recalculadas: %d proyecto(s) con banderas actualizadas', updated)
+        return updated
     
     def write(self, vals):
+        if vals.get('promise_date') and 'promise_date_assigned_at' not in vals:
+            # Registrar solo la primera asignación de la fecha prometida
+            unstamped = self.filtered(lambda r: not r.promise_date_assigned_at)
+            if unstamped:
+                super(TrackerProject, unstamped).write({'promise_date_assigned_at': fields.Datetime.now()})
+        
         if 'state' in vals:
             vals['state_changed_by'] = self.env.user.id
             vals['state_changed_date'] = fields.Datetime.now()
@@ -707,10 +1103,80 @@ class TrackerProject(models.Model):
             'target': 'new',
             'context': {
                 'active_id': self.id,
+                'active_ids': self.ids,
                 'active_model': 'tracker.project',
             }
         }
     
+    def _get_boleta_version(self):
+        """Versión de la boleta de despacho, usada en el nombre del adjunto en caché
+        
+        Cambia cuando se modifica el proyecto o el cliente, lo que obliga a
+        renderizar de nuevo; mientras no cambie, la reimpresión usa el PDF guardado.
+        """
+        self.ensure_one()
+        dates = [self.write_date, self.partner_id.write_date]
+        return '-'.join(date.strftime('%Y%m%d%H%M%S') for date in dates if date)
+    
+    def _get_boleta_attachments(self):
+        """Renderizar las boletas que falten y devolver {project_id: adjunto}
+        
+        Las boletas sin adjunto para su versión actual se renderizan en una sola
+        pasada de wkhtmltopdf; el reporte guarda un adjunto por proyecto.
+        """
+        report = self.env.ref('sm_tracker.action_report_boleta_despacho')
+        # Precargar en una lectura lo que usa la plantilla y el nombre del adjunto
+        self.fetch(['name', 'order_reference', 'create_date', 'write_date', 'partner_id', 'user_id'])
+        self.partner_id.fetch(['name', 'write_date'])
+        self.user_id.fetch(['name'])
+        
+        report._render_qweb_pdf(report.report_name, res_ids=self.ids)
+        
+        names = {
+            project.id: 'Boleta_Despacho_%s_%s.pdf' % (project.name, project._get_boleta_version())
+            for project in self
+        }
+        attachments = self.env['ir.attachment'].search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', self.ids),
+            ('name', 'in', list(names.values())),
+        ])
+        return {
+            attachment.res_id: attachment
+            for attachment in attachments
+            if names.get(attachment.res_id) == attachment.name
+        }
+    
+    def _render_boletas_zip(self):
+        """ZIP con una boleta de despacho en PDF por proyecto"""
+        attachments = self._get_boleta_attachments()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for project in self:
+                attachment = attachments.get(project.id)
+                if attachment:
+                    archive.writestr('Boleta_Despacho_%s.pdf' % project.name, attachment.raw)
+        return buffer.getvalue()
+    
+    def action_export_boletas_zip(self):
+        """Descargar las boletas de despacho seleccionadas en un ZIP"""
+        if not self:
+            raise UserError(_('Seleccione al menos un proyecto.'))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/sm_tracker/boletas/zip?ids=%s' % ','.join(str(project_id) for project_id in self.ids),
+            'target': 'self',
+        }
+    
+    @api.autovacuum
+    def _gc_boleta_attachments(self):
+        """Borrar boletas en caché de más de 30 días (se regeneran al reimprimir)"""
+        limit_date = fields.Datetime.now() - timedelta(days=30)
+        self.env['ir.attachment'].search([
+            ('res_model', '=', self._name),
+            ('name', '=like', 'Boleta_Despacho_%'),
+            ('create_date', '<', limit_date),
+        ]).unlink()
     
     def action_view_tasks(self):
         self.ensure_one()
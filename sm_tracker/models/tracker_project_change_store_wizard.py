@@ -2,24 +2,32 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
-from datetime import datetime
+
+OPEN_PROJECT_STATES = ['pending', 'processing', 'pending_delivery']
 
 
 class TrackerProjectChangeStoreWizard(models.TransientModel):
     _name = 'tracker.project.change.store.wizard'
     _description = 'Wizard para Cambiar Tienda del Proyecto'
     
+    mode = fields.Selection([
+        ('selected', 'Proyectos seleccionados'),
+        ('store', 'Todos los proyectos abiertos de una tienda'),
+    ], string='Aplicar a', required=True, default='selected')
+    
     project_id = fields.Many2one(
         'tracker.project',
-        string='Proyecto',
-        required=True
+        string='Proyecto'
+    )
+    
+    project_ids = fields.Many2many(
+        'tracker.project',
+        string='Proyectos'
     )
     
     old_store_id = fields.Many2one(
         'account.analytic.account',
-        string='Tienda Actual',
-        required=True,
-        readonly=True
+        string='Tienda Actual'
     )
     
     new_store_id = fields.Many2one(
@@ -34,22 +42,58 @@ class TrackerProjectChangeStoreWizard(models.TransientModel):
         help='Explique por qué se está cambiando la tienda del proyecto'
     )
     
+    project_count = fields.Integer(
+        string='Proyectos a Mover',
+        compute='_compute_project_count'
+    )
+    
     @api.model
     def default_get(self, fields_list):
-        """Obtener valores por defecto incluyendo el proyecto actual"""
+        """Obtener valores por defecto incluyendo los proyectos seleccionados"""
         res = super(TrackerProjectChangeStoreWizard, self).default_get(fields_list)
         
-        # Obtener el proyecto del contexto
-        project_id = self.env.context.get('active_id')
-        if project_id:
-            project = self.env['tracker.project'].browse(project_id)
+        # Obtener los proyectos del contexto
+        if self.env.context.get('active_model', 'tracker.project') != 'tracker.project':
+            return res
+        project_ids = self.env.context.get('active_ids') or (
+            [self.env.context['active_id']] if self.env.context.get('active_id') else []
+        )
+        if project_ids:
+            projects = self.env['tracker.project'].browse(project_ids)
             res.update({
-                'project_id': project.id,
-                'old_store_id': project.analytic_account_id.id if project.analytic_account_id else False,
+                'project_id': projects[0].id if len(projects) == 1 else False,
+                'project_ids': [(6, 0, projects.ids)],
+                'old_store_id': projects.analytic_account_id.id if len(projects.analytic_account_id) == 1 else False,
             })
         
         return res
     
+    @api.depends('mode', 'project_ids', 'old_store_id')
+    def _compute_project_count(self):
+        for wizard in self:
+            if wizard.mode == 'store':
+                wizard.project_count = self.env['tracker.project'].search_count(
+                    wizard._get_store_domain()
+                ) if wizard.old_store_id else 0
+            else:
+                wizard.project_count = len(wizard.project_ids)
+    
+    def _get_store_domain(self):
+        self.ensure_one()
+        return [
+            ('analytic_account_id', '=', self.old_store_id.id),
+            ('state', 'in', OPEN_PROJECT_STATES),
+        ]
+    
+    def _get_projects(self):
+        """Proyectos a mover según el modo del wizard"""
+        self.ensure_one()
+        if self.mode == 'store':
+            if not self.old_store_id:
+                raise UserError(_('Debe indicar la tienda de la que se moverán los proyectos.'))
+            return self.env['tracker.project'].search(self._get_store_domain())
+        return self.project_ids or self.project_id
+    
     def action_confirm_change(self):
         """Confirmar el cambio de tienda"""
         self.ensure_one()
@@ -57,29 +101,10 @@ class TrackerProjectChangeStoreWizard(models.TransientModel):
         if not self.reason:
             raise UserError(_('Debe proporcionar una razón para el cambio de tienda.'))
         
-        # Preparar el registro del cambio
-        change_date = fields.Datetime.now()
-        user = self.env.user
-        
-        change_log = f"""
-[{change_date}] {user.name}
-Tienda anterior: {self.old_store_id.name}
-Nueva tienda: {self.new_store_id.name}
-Razón: {self.reason}
-{'='*60}
-"""
-        
-        # Actualizar el proyecto
-        self.project_id.write({
-            'analytic_account_id': self.new_store_id.id,
-            'previous_analytic_account_id': self.old_store_id.id,
-            'store_change_reason': self.reason,
-            'store_change_history': (self.project_id.store_change_history or '') + change_log
-        })
+        projects = self._get_projects()
+        if not projects:
+            raise UserError(_('No hay proyectos para cambiar de tienda.'))
         
-        # Actualizar la tienda de todas las tareas del proyecto
-        self.project_id.task_ids.write({
-            'analytic_account_id': self.new_store_id.id
-        })
+        projects._change_store(self.new_store_id, self.reason)
         
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+        return {'type': 'ir.actions.act_window_close'}
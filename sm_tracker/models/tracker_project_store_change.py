@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+from odoo import models, fields, api, _
+from odoo.tools import sql
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Formato del antiguo historial en texto (store_change_history)
+HISTORY_ENTRY_RE = re.compile(
+    r'\[(?P<date>[^\]]+)\]\s*(?P<user>[^\n]*)\n'
+    r'Tienda anterior:\s*(?P<old>[^\n]*)\n'
+    r'Nueva tienda:\s*(?P<new>[^\n]*)\n'
+    r'Razón:\s*(?P<reason>.*)',
+    re.DOTALL,
+)
+
+
+class TrackerProjectStoreChange(models.Model):
+    _name = 'tracker.project.store.change'
+    _description = 'Cambio de Tienda de Proyecto'
+    _order = 'date desc, id desc'
+    _rec_name = 'project_id'
+
+    project_id = fields.Many2one(
+        'tracker.project',
+        string='Proyecto',
+        required=True,
+        index=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    old_store_id = fields.Many2one(
+        'account.analytic.account',
+        string='Tienda Anterior',
+        index=True,
+        readonly=True
+    )
+
+    new_store_id = fields.Many2one(
+        'account.analytic.account',
+        string='Nueva Tienda',
+        required=True,
+        index=True,
+        readonly=True
+    )
+
+    date = fields.Datetime(
+        string='Fecha',
+        required=True,
+        index=True,
+        readonly=True,
+        default=fields.Datetime.now
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Usuario',
+        readonly=True,
+        default=lambda self: self.env.user
+    )
+
+    reason = fields.Text(
+        string='Razón',
+        readonly=True
+    )
+
+    task_count = fields.Integer(
+        string='Tareas Movidas',
+        readonly=True
+    )
+
+    @api.model
+    def _migrate_text_history(self):
+        """Pasar el antiguo historial en texto a registros y borrar la columna
+
+        Las entradas que no se pueden interpretar se guardan con el texto
+        completo como razón, para no perder información.
+        """
+        cr = self.env.cr
+        if not sql.column_exists(cr, 'tracker_project', 'store_change_history'):
+            return
+        cr.execute("""
+            SELECT id, analytic_account_id, store_change_history
+              FROM tracker_project
+             WHERE store_change_history IS NOT NULL AND store_change_history != ''
+        """)
+        rows = cr.fetchall()
+
+        Analytic = self.env['account.analytic.account'].with_context(active_test=False)
+        Users = self.env['res.users'].with_context(active_test=False)
+        vals_list = []
+        for project_id, current_store_id, history in rows:
+            for chunk in history.split('=' * 60):
+                chunk = chunk.strip()
+                if not chunk:
+                    continue
+                match = HISTORY_ENTRY_RE.match(chunk)
+                if not match:
+                    vals_list.append({
+                        'project_id': project_id,
+                        'new_store_id': current_store_id,
+                        'reason': chunk,
+                    })
+                    continue
+                old_store = Analytic.search([('name', '=', match['old'].strip())], limit=1)
+                new_store = Analytic.search([('name', '=', match['new'].strip())], limit=1)
+                user = Users.search([('name', '=', match['user'].strip())], limit=1)
+                try:
+                    date = fields.Datetime.to_datetime(match['date'].strip()[:19])
+                except ValueError:
+                    date = False
+                vals_list.append({
+                    'project_id': project_id,
+                    'old_store_id': old_store.id,
+                    'new_store_id': new_store.id or current_store_id,
+                    'user_id': user.id,
+                    'date': date or fields.Datetime.now(),
+                    'reason': match['reason'].strip(),
+                })
+
+        vals_list = [vals for vals in vals_list if vals['new_store_id']]
+        if vals_list:
+            self.create(vals_list)
+        cr.execute("ALTER TABLE tracker_project DROP COLUMN store_change_history")
+        _logger.info('Historial de cambios de tienda migrado: %d registro(s) de %d proyecto(s)',
+                     len(vals_list), len(rows))
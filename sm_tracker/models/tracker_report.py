@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+
+
+class TrackerProjectReport(models.Model):
+    _name = 'tracker.project.report'
+    _description = 'Análisis de Proyectos Tracker'
+    _auto = False
+    _order = 'create_date desc'
+
+    project_id = fields.Many2one('tracker.project', string='Proyecto', readonly=True)
+    name = fields.Char(string='Referencia', readonly=True)
+    analytic_account_id = fields.Many2one('account.analytic.account', string='Tienda', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Cliente', readonly=True)
+    user_id = fields.Many2one('res.users', string='Responsable', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    origen_type = fields.Char(string='Origen', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pendiente'),
+        ('processing', 'Procesando'),
+        ('pending_delivery', 'Pendiente de Entrega'),
+        ('cancel', 'Anulado'),
+        ('delivered', 'Entregado'),
+    ], string='Estado', readonly=True)
+    overdue_bucket = fields.Selection([
+        ('on_time', 'A Tiempo'),
+        ('1_day', '1 Día'),
+        ('2_3_days', '2-3 Días'),
+        ('4_plus_days', '4+ Días'),
+    ], string='Rango de Retraso', readonly=True)
+    is_cnc = fields.Boolean(string='CNC', readonly=True)
+    is_despacho_host = fields.Boolean(string='Despacho Host', readonly=True)
+    create_date = fields.Datetime(string='Fecha de Creación', readonly=True)
+    promise_date = fields.Datetime(string='Fecha Prometida', readonly=True)
+    completion_date = fields.Datetime(string='Fecha de Finalización', readonly=True)
+    delivery_date = fields.Datetime(string='Fecha de Entrega', readonly=True)
+    nbr = fields.Integer(string='# Proyectos', readonly=True)
+    task_count = fields.Integer(string='Total Tareas', readonly=True)
+    total_hours = fields.Float(string='Horas Totales', readonly=True)
+    delay_days = fields.Integer(string='Días de Retraso', readonly=True, group_operator='avg')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT p.id AS id,
+                       p.id AS project_id,
+                       p.name AS name,
+                       p.analytic_account_id AS analytic_account_id,
+                       p.partner_id AS partner_id,
+                       p.user_id AS user_id,
+                       p.company_id AS company_id,
+                       p.origen_type AS origen_type,
+                       p.state AS state,
+                       p.overdue_bucket AS overdue_bucket,
+                       p.is_cnc AS is_cnc,
+                       p.is_despacho_host AS is_despacho_host,
+                       p.create_date AS create_date,
+                       p.promise_date AS promise_date,
+                       p.completion_date AS completion_date,
+                       p.delivery_date AS delivery_date,
+                       1 AS nbr,
+                       COALESCE(t.task_count, 0) AS task_count,
+                       COALESCE(t.total_hours, 0.0) AS total_hours,
+                       p.delay_days AS delay_days
+                  FROM tracker_project p
+             LEFT JOIN (
+                        SELECT project_id,
+                               COUNT(*) AS task_count,
+                               SUM(total_hours) AS total_hours
+                          FROM tracker_task
+                      GROUP BY project_id
+                       ) t ON t.project_id = p.id
+            )
+        """ % self._table)
+
+
+class TrackerTaskReport(models.Model):
+    _name = 'tracker.task.report'
+    _description = 'Análisis de Tareas Tracker'
+    _auto = False
+    _order = 'create_date desc'
+
+    task_id = fields.Many2one('tracker.task', string='Tarea', readonly=True)
+    project_id = fields.Many2one('tracker.project', string='Proyecto', readonly=True)
+    analytic_account_id = fields.Many2one('account.analytic.account', string='Tienda', readonly=True)
+    employee_id = fields.Many2one('hr.employee', string='Operario', readonly=True)
+    product_id = fields.Many2one('product.product', string='Servicio', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Cliente', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pendiente'),
+        ('ready', 'Listo'),
+        ('in_progress', 'En Progreso'),
+        ('paused', 'Pausado'),
+        ('done', 'Terminado'),
+        ('cancel', 'Cancelado'),
+    ], string='Estado', readonly=True)
+    project_state = fields.Selection([
+        ('pending', 'Pendiente'),
+        ('processing', 'Procesando'),
+        ('pending_delivery', 'Pendiente de Entrega'),
+        ('cancel', 'Anulado'),
+        ('delivered', 'Entregado'),
+    ], string='Estado Proyecto', readonly=True)
+    create_date = fields.Datetime(string='Fecha de Creación', readonly=True)
+    promise_date = fields.Datetime(string='Fecha Prometida', readonly=True)
+    nbr = fields.Integer(string='# Tareas', readonly=True)
+    quantity = fields.Float(string='Cantidad', readonly=True)
+    quantity_done = fields.Float(string='Cantidad Realizada', readonly=True)
+    expected_hours = fields.Float(string='Duración Esperada', readonly=True)
+    total_hours = fields.Float(string='Horas Totales', readonly=True)
+    timesheet_count = fields.Integer(string='# Registros de Tiempo', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT t.id AS id,
+                       t.id AS task_id,
+                       t.project_id AS project_id,
+                       t.analytic_account_id AS analytic_account_id,
+                       t.employee_id AS employee_id,
+                       t.product_id AS product_id,
+                       p.partner_id AS partner_id,
+                       t.company_id AS company_id,
+                       t.state AS state,
+                       p.state AS project_state,
+                       t.create_date AS create_date,
+                       p.promise_date AS promise_date,
+                       1 AS nbr,
+                       t.quantity AS quantity,
+                       t.quantity_done AS quantity_done,
+                       t.expected_hours AS expected_hours,
+                       COALESCE(ts.hours, 0.0) AS total_hours,
+                       COALESCE(ts.timesheet_count, 0) AS timesheet_count
+                  FROM tracker_task t
+                  JOIN tracker_project p ON p.id = t.project_id
+             LEFT JOIN (
+                        SELECT task_id,
+                               COUNT(*) AS timesheet_count,
+                               SUM(hours) AS hours
+                          FROM tracker_timesheet
+                      GROUP BY task_id
+                       ) ts ON ts.task_id = t.id
+            )
+        """ % self._table)
+
+
+class TrackerTimesheetReport(models.Model):
+    _name = 'tracker.timesheet.report'
+    _description = 'Análisis de Horas Tracker'
+    _auto = False
+    _order = 'date desc'
+
+    timesheet_id = fields.Many2one('tracker.timesheet', string='Registro', readonly=True)
+    task_id = fields.Many2one('tracker.task', string='Tarea', readonly=True)
+    project_id = fields.Many2one('tracker.project', string='Proyecto', readonly=True)
+    analytic_account_id = fields.Many2one('account.analytic.account', string='Tienda', readonly=True)
+    employee_id = fields.Many2one('hr.employee', string='Empleado', readonly=True)
+    product_id = fields.Many2one('product.product', string='Servicio', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Cliente', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    date = fields.Date(string='Fecha', readonly=True)
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('running', 'En Progreso'),
+        ('stopped', 'Detenido'),
+    ], string='Estado', readonly=True)
+    nbr = fields.Integer(string='# Registros', readonly=True)
+    hours = fields.Float(string='Horas', readonly=True)
+    quantity = fields.Float(string='Cantidad', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT ts.id AS id,
+                       ts.id AS timesheet_id,
+                       ts.task_id AS task_id,
+                       t.project_id AS project_id,
+                       ts.analytic_account_id AS analytic_account_id,
+                       ts.employee_id AS employee_id,
+                       t.product_id AS product_id,
+                       p.partner_id AS partner_id,
+                       ts.company_id AS company_id,
+                       ts.date AS date,
+                       ts.state AS state,
+                       1 AS nbr,
+                       ts.hours AS hours,
+                       t.quantity AS quantity
+                  FROM tracker_timesheet ts
+                  JOIN tracker_task t ON t.id = ts.task_id
+                  JOIN tracker_project p ON p.id = t.project_id
+            )
+        """ % self._table)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Clasificación previa, fija en el código (se usa solo para migrar productos existentes)
+LEGACY_CATEGORY_CODES = {
+    'sm_tracker.service_category_cortes': ['CORTES', 'CORTESEXTERNOS'],
+    'sm_tracker.service_category_pegado_canto': ['PEGADOCANTO', 'PEGADOCANTO2', 'PEGADOCANTOEXTERNO'],
+    'sm_tracker.service_category_despacho_host': ['S-024'],
+}
+
+
+class TrackerServiceCategory(models.Model):
+    _name = 'tracker.service.category'
+    _description = 'Categoría de Servicio del Tracker'
+    _order = 'sequence, name'
+
+    name = fields.Char(
+        string='Nombre',
+        required=True,
+        translate=True
+    )
+
+    code = fields.Char(
+        string='Código',
+        required=True
+    )
+
+    sequence = fields.Integer(
+        string='Secuencia',
+        default=10
+    )
+
+    active = fields.Boolean(
+        string='Activo',
+        default=True
+    )
+
+    is_cnc = fields.Boolean(
+        string='Marca CNC',
+        help='Los proyectos con servicios de esta categoría se marcan como CNC'
+    )
+
+    is_despacho_host = fields.Boolean(
+        string='Marca Despacho Host',
+        help='Los proyectos con servicios de esta categoría se marcan como despacho host'
+    )
+
+    product_ids = fields.One2many(
+        'product.product',
+        'tracker_service_category_id',
+        string='Servicios'
+    )
+
+    product_count = fields.Integer(
+        string='# Servicios',
+        compute='_compute_product_count'
+    )
+
+    _sql_constraints = [
+        ('code_unique', 'unique(code)', 'Ya existe una categoría de servicio con este código.'),
+    ]
+
+    def _compute_product_count(self):
+        counts = dict(self.env['product.product']._read_group(
+            [('tracker_service_category_id', 'in', self.ids)],
+            ['tracker_service_category_id'], ['__count'],
+        ))
+        for category in self:
+            category.product_count = counts.get(category, 0)
+
+    def write(self, vals):
+        res = super(TrackerServiceCategory, self).write(vals)
+        if 'is_cnc' in vals or 'is_despacho_host' in vals:
+            self.env['tracker.project']._sync_service_categories(category_ids=self.ids)
+        return res
+
+    def unlink(self):
+        # Los productos quedan sin categoría (ondelete) y los proyectos pierden sus banderas
+        product_ids = self.product_ids.ids
+        res = super(TrackerServiceCategory, self).unlink()
+        if product_ids:
+            self.env['tracker.project']._sync_service_categories(product_ids=product_ids)
+        return res
+
+    @api.model
+    def _assign_legacy_products(self):
+        """Asignar categoría a los servicios que antes se detectaban en el código
+
+        Despacho host por referencia interna y CNC por nombre; solo toca
+        productos sin categoría.
+        """
+        Product = self.env['product.product'].with_context(active_test=False)
+        for xmlid, codes in LEGACY_CATEGORY_CODES.items():
+            category = self.env.ref(xmlid, raise_if_not_found=False)
+            if category:
+                Product.search([
+                    ('default_code', 'in', codes),
+                    ('tracker_service_category_id', '=', False),
+                ]).write({'tracker_service_category_id': category.id})
+        category = self.env.ref('sm_tracker.service_category_cnc', raise_if_not_found=False)
+        if category:
+            Product.search([
+                ('name', 'ilike', 'CNC'),
+                ('tracker_service_category_id', '=', False),
+            ]).write({'tracker_service_category_id': category.id})
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TrackerServiceClosure(models.Model):
+    """Índice de servicios tracker alcanzables desde la BoM de una plantilla.
+
+    Cada registro guarda, para una plantilla de producto, los servicios con
+    tracker_active=True que aparecen en su árbol de materiales (con la cantidad
+    acumulada por unidad). Se llena bajo demanda y se invalida cuando cambian
+    las BoMs o los productos involucrados.
+    """
+    _name = 'tracker.service.closure'
+    _description = 'Índice de Servicios por BoM'
+    _rec_name = 'product_tmpl_id'
+
+    product_tmpl_id = fields.Many2one(
+        'product.template',
+        string='Producto',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    has_bom = fields.Boolean(
+        string='Tiene BoM',
+        help='Indica si la plantilla tenía lista de materiales al calcular el índice'
+    )
+
+    line_ids = fields.One2many(
+        'tracker.service.closure.line',
+        'closure_id',
+        string='Servicios'
+    )
+
+    _sql_constraints = [
+        ('product_tmpl_uniq', 'unique(product_tmpl_id)',
+         'Solo puede existir un índice de servicios por producto.'),
+    ]
+
+    @api.model
+    def _is_tracker_service(self, product):
+        """Servicio que genera tareas en el tracker"""
+        return product.type == 'service' and product.tracker_active
+
+    @api.model
+    def _get_closures(self, templates):
+        """Devolver {template_id: (has_bom, {service_product_id: qty_por_unidad})}
+
+        Los índices que no existen se calculan y se guardan en ese momento.
+        """
+        templates = templates.exists()
+        result = {}
+        if not templates:
+            return result
+
+        closures = self.sudo().search([('product_tmpl_id', 'in', templates.ids)])
+        for closure in closures:
+            result[closure.product_tmpl_id.id] = (
+                closure.has_bom,
+                {line.service_id.id: line.quantity for line in closure.line_ids},
+            )
+
+        missing = templates.filtered(lambda t: t.id not in result)
+        if missing:
+            result.update(self._build_closures(missing))
+        return result
+
+    @api.model
+    def _build_closures(self, templates):
+        """Explorar las BoMs nivel por nivel (una búsqueda por nivel) y guardar el índice"""
+        Bom = self.env['mrp.bom'].sudo()
+        bom_by_tmpl = {}
+        pending = set(templates.ids)
+
+        while pending:
+            found = {}
+            # mrp.bom viene ordenado por secuencia: la primera BoM de cada plantilla gana,
+            # igual que search(..., limit=1)
+            for bom in Bom.search([('product_tmpl_id', 'in', list(pending))]):
+                found.setdefault(bom.product_tmpl_id.id, bom)
+
+            children = set()
+            for tmpl_id in pending:
+                bom = found.get(tmpl_id)
+                bom_by_tmpl[tmpl_id] = bom
+                if not bom:
+                    continue
+                for line in bom.bom_line_ids:
+                    if not self._is_tracker_service(line.product_id):
+                        children.add(line.product_id.product_tmpl_id.id)
+            pending = children - set(bom_by_tmpl)
+
+        memo = {}
+
+        def explode(tmpl_id, path):
+            if tmpl_id in memo:
+                return memo[tmpl_id]
+            services = defaultdict(float)
+            bom = bom_by_tmpl.get(tmpl_id)
+            # path evita ciclos en BoMs mal configuradas
+            if bom and tmpl_id not in path:
+                for line in bom.bom_line_ids:
+                    component = line.product_id
+                    if self._is_tracker_service(component):
+                        services[component.id] += line.product_qty
+                    else:
+                        child = explode(component.product_tmpl_id.id, path | {tmpl_id})
+                        for service_id, qty in child.items():
+                            services[service_id] += qty * line.product_qty
+            memo[tmpl_id] = dict(services)
+            return memo[tmpl_id]
+
+        for tmpl_id in bom_by_tmpl:
+            explode(tmpl_id, frozenset())
+
+        # Guardar también los niveles intermedios. ON CONFLICT: dos transacciones
+        # (sincronización POS, confirmación de venta) que indexan la misma plantilla
+        # no fallan por la restricción única; la segunda simplemente no inserta
+        tmpl_ids = list(memo)
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO tracker_service_closure
+                   (product_tmpl_id, has_bom, create_uid, create_date, write_uid, write_date)
+            SELECT t.product_tmpl_id, t.has_bom,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(tmpl_ids)s::int[], %(has_bom)s::bool[]) AS t(product_tmpl_id, has_bom)
+            ON CONFLICT (product_tmpl_id) DO NOTHING
+            RETURNING id, product_tmpl_id
+        """, {
+            'uid': self.env.uid,
+            'tmpl_ids': tmpl_ids,
+            'has_bom': [bool(bom_by_tmpl.get(tmpl_id)) for tmpl_id in tmpl_ids],
+        })
+        inserted = self.env.cr.fetchall()
+        line_vals = [
+            {'closure_id': closure_id, 'service_id': service_id, 'quantity': qty}
+            for closure_id, tmpl_id in inserted
+            for service_id, qty in memo[tmpl_id].items()
+        ]
+        if line_vals:
+            self.env['tracker.service.closure.line'].sudo().create(line_vals)
+        if inserted:
+            _logger.debug('Índice de servicios calculado para %d plantilla(s)', len(inserted))
+
+        return {
+            tmpl_id: (bool(bom_by_tmpl.get(tmpl_id)), memo[tmpl_id])
+            for tmpl_id in templates.ids
+        }
+
+    @api.model
+    def _get_service_product_ids(self, products):
+        """Ids de los productos que son servicio tracker o tienen servicios en su BoM
+
+        Resuelve todo el recordset con una sola consulta al índice, pensado para
+        computes sobre muchas órdenes a la vez.
+        """
+        products = products.exists()
+        closures = self._get_closures(products.product_tmpl_id)
+        return {
+            product.id for product in products
+            if self._is_tracker_service(product)
+            or closures.get(product.product_tmpl_id.id, (False, {}))[1]
+        }
+
+    @api.model
+    def _explode_services(self, product_qty_list, closures=None):
+        """Convertir [(producto, cantidad)] en {servicio: cantidad} usando el índice
+
+        Si el producto tiene BoM se usan sus servicios; si no, el producto cuenta
+        como servicio directo cuando tiene tracker_active. Para varias órdenes se
+        puede pasar closures (de _get_closures) ya leído una sola vez.
+        """
+        product_qty_list = [(product, qty) for product, qty in product_qty_list if product]
+        if closures is None:
+            templates = self.env['product.template'].browse(
+                {product.product_tmpl_id.id for product, qty in product_qty_list}
+            )
+            closures = self._get_closures(templates)
+        Product = self.env['product.product']
+
+        service_qty = defaultdict(float)
+        for product, qty in product_qty_list:
+            has_bom, services = closures.get(product.product_tmpl_id.id, (False, {}))
+            if has_bom:
+                for service_id, unit_qty in services.items():
+                    service_qty[service_id] += qty * unit_qty
+            elif self._is_tracker_service(product):
+                service_qty[product.id] += qty
+
+        return {Product.browse(service_id): qty for service_id, qty in service_qty.items()}
+
+    @api.model
+    def _invalidate_templates(self, templates):
+        """Borrar el índice de las plantillas y de todas las que las usan como componente"""
+        affected = set(templates.ids)
+        frontier = set(affected)
+        BomLine = self.env['mrp.bom.line'].sudo()
+        while frontier:
+            lines = BomLine.search([('product_id.product_tmpl_id', 'in', list(frontier))])
+            parents = set(lines.mapped('bom_id.product_tmpl_id').ids)
+            frontier = parents - affected
+            affected |= parents
+
+        closures = self.sudo().search([('product_tmpl_id', 'in', list(affected))])
+        if closures:
+            _logger.debug('Invalidando índice de servicios de %d plantilla(s)', len(closures))
+            closures.unlink()
+
+
+class TrackerServiceClosureLine(models.Model):
+    _name = 'tracker.service.closure.line'
+    _description = 'Servicio del Índice de BoM'
+
+    closure_id = fields.Many2one(
+        'tracker.service.closure',
+        string='Índice',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    service_id = fields.Many2one(
+        'product.product',
+        string='Servicio',
+        required=True,
+        ondelete='cascade'
+    )
+
+    quantity = fields.Float(
+        string='Cantidad por Unidad',
+        help='Cantidad acumulada del servicio por unidad del producto'
+    )
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.tools import create_index
+import logging
+
+_logger = logging.getLogger(__name__)
+
+WINDOW_DAYS_PARAM = 'sm_tracker.duration_stats_window_days'
+REFRESHED_AT_PARAM = 'sm_tracker.duration_stats_refreshed_at'
+# Muestras mínimas para usar la estadística de la tienda en lugar de la global
+MIN_STORE_SAMPLES = 5
+
+
+class TrackerServiceDurationStat(models.Model):
+    """Duración histórica por unidad de cada servicio, por tienda y global.
+
+    Se calcula en SQL (percentiles) sobre las tareas terminadas dentro de una
+    ventana móvil. Cada refresco recalcula solo los pares servicio/tienda con
+    tareas terminadas desde el refresco anterior o que salieron de la ventana.
+    La fila sin tienda agrupa todas las tiendas del servicio.
+    """
+    _name = 'tracker.service.duration.stat'
+    _description = 'Duración Histórica de Servicios del Tracker'
+    _order = 'product_id, analytic_account_id'
+    _rec_name = 'product_id'
+
+    product_id = fields.Many2one(
+        'product.product',
+        string='Servicio',
+        required=True,
+        readonly=True,
+        ondelete='cascade'
+    )
+
+    analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string='Tienda',
+        readonly=True,
+        ondelete='cascade',
+        help='Vacío: estadística de todas las tiendas'
+    )
+
+    sample_count = fields.Integer(
+        string='# Tareas',
+        readonly=True
+    )
+
+    hours_p50 = fields.Float(
+        string='Horas por Unidad (P50)',
+        readonly=True,
+        group_operator='avg'
+    )
+
+    hours_p90 = fields.Float(
+        string='Horas por Unidad (P90)',
+        readonly=True,
+        group_operator='avg'
+    )
+
+    hours_avg = fields.Float(
+        string='Horas por Unidad (Promedio)',
+        readonly=True,
+        group_operator='avg'
+    )
+
+    date_refreshed = fields.Datetime(
+        string='Actualizado',
+        readonly=True
+    )
+
+    def init(self):
+        # Un registro por servicio y tienda (NULL = todas las tiendas)
+        self._cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS tracker_service_duration_stat_key_index
+                ON tracker_service_duration_stat (product_id, COALESCE(analytic_account_id, 0))
+        """)
+        # Tareas terminadas por fecha de cierre: la ventana se lee sin recorrer todo el historial
+        create_index(self._cr, 'tracker_task_done_date_index', 'tracker_task',
+                     ['state_changed_date', 'product_id', 'analytic_account_id'], where="state = 'done'")
+
+    @api.model
+    def _get_window_days(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(WINDOW_DAYS_PARAM, 180))
+
+    @api.model
+    def _cron_refresh(self):
+        """Refrescar los pares servicio/tienda que cambiaron desde la última ejecución"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        now = fields.Datetime.now()
+        window_start = now - timedelta(days=self._get_window_days())
+        refreshed_at = ICP.get_param(REFRESHED_AT_PARAM)
+        if not refreshed_at:
+            count = self._refresh(window_start)
+        else:
+            previous = fields.Datetime.to_datetime(refreshed_at)
+            previous_window_start = previous - timedelta(days=self._get_window_days())
+            self.env['tracker.task'].flush_model(['state', 'state_changed_date', 'product_id', 'analytic_account_id'])
+            # Terminadas desde el último refresco o que salieron de la ventana
+            self.env.cr.execute("""
+                SELECT DISTINCT product_id, analytic_account_id
+                  FROM tracker_task
+                 WHERE state = 'done'
+                   AND (state_changed_date > %s
+                        OR state_changed_date >= %s AND state_changed_date < %s)
+            """, (previous, previous_window_start, window_start))
+            pairs = self.env.cr.fetchall()
+            count = self._refresh(window_start, pairs) if pairs else 0
+        ICP.set_param(REFRESHED_AT_PARAM, fields.Datetime.to_string(now))
+        return count
+
+    @api.model
+    def _refresh(self, window_start, pairs=None):
+        """Recalcular en SQL las estadísticas de los pares dados (o de todos)
+
+        pairs es una lista de (product_id, analytic_account_id); las filas
+        globales de sus servicios también se recalculan.
+        """
+        self.env['tracker.task'].flush_model(
+            ['state', 'state_changed_date', 'product_id', 'analytic_account_id', 'total_hours', 'quantity']
+        )
+        self.flush_model()
+        cr = self.env.cr
+        params = {
+            'window_start': window_start,
+            'all': pairs is None,
+            'product_ids': [pair[0] for pair in pairs or []],
+            'store_ids': [pair[1] for pair in pairs or []],
+        }
+        samples = """
+            SELECT t.product_id, t.analytic_account_id, t.total_hours / t.quantity AS hours_per_unit
+              FROM tracker_task t
+             WHERE t.state = 'done'
+               AND t.state_changed_date >= %(window_start)s
+               AND t.total_hours > 0
+               AND t.quantity > 0
+               AND (%(all)s OR t.product_id = ANY(%(product_ids)s))
+        """
+        cr.execute("""
+            WITH samples AS (""" + samples + """),
+            dirty AS (
+                SELECT DISTINCT * FROM unnest(%(product_ids)s::int[], %(store_ids)s::int[]) AS d(product_id, analytic_account_id)
+            ),
+            grouped AS (
+                SELECT s.product_id, s.analytic_account_id,
+                       COUNT(*) AS sample_count,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY s.hours_per_unit) AS hours_p50,
+                       percentile_cont(0.9) WITHIN GROUP (ORDER BY s.hours_per_unit) AS hours_p90,
+                       AVG(s.hours_per_unit) AS hours_avg
+                  FROM samples s
+                 WHERE %(all)s OR (s.product_id, s.analytic_account_id) IN (SELECT product_id, analytic_account_id FROM dirty)
+              GROUP BY s.product_id, s.analytic_account_id
+             UNION ALL
+                SELECT s.product_id, NULL,
+                       COUNT(*),
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY s.hours_per_unit),
+                       percentile_cont(0.9) WITHIN GROUP (ORDER BY s.hours_per_unit),
+                       AVG(s.hours_per_unit)
+                  FROM samples s
+              GROUP BY s.product_id
+            )
+            INSERT INTO tracker_service_duration_stat
+                   (product_id, analytic_account_id, sample_count, hours_p50, hours_p90, hours_avg,
+                    date_refreshed, create_uid, create_date, write_uid, write_date)
+            SELECT product_id, analytic_account_id, sample_count, hours_p50, hours_p90, hours_avg,
+                   now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM grouped
+            ON CONFLICT (product_id, COALESCE(analytic_account_id, 0)) DO UPDATE
+               SET sample_count = EXCLUDED.sample_count,
+                   hours_p50 = EXCLUDED.hours_p50,
+                   hours_p90 = EXCLUDED.hours_p90,
+                   hours_avg = EXCLUDED.hours_avg,
+                   date_refreshed = EXCLUDED.date_refreshed,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+         RETURNING product_id, analytic_account_id
+        """, dict(params, uid=self.env.uid))
+        kept = cr.fetchall()
+
+        # Pares recalculados que se quedaron sin muestras dentro de la ventana
+        cr.execute("""
+            DELETE FROM tracker_service_duration_stat
+             WHERE date_refreshed < now() at time zone 'UTC'
+               AND (%(all)s
+                    OR (analytic_account_id IS NULL AND product_id = ANY(%(product_ids)s))
+                    OR (product_id, analytic_account_id) IN (
+                        SELECT * FROM unnest(%(product_ids)s::int[], %(store_ids)s::int[])))
+        """, params)
+        self.invalidate_model()
+        _logger.info('Estadísticas de duración recalculadas: %d fila(s)', len(kept))
+        return len(kept)
+
+    @api.model
+    def _get_hours_per_unit(self, tasks, measure='hours_p50'):
+        """Horas por unidad de cada tarea según su servicio y tienda: {task_id: horas}
+
+        Usa la estadística de la tienda si tiene muestras suficientes y, si no,
+        la de todas las tiendas. Las tareas sin historial no aparecen.
+        """
+        stats = self.sudo().search([('product_id', 'in', tasks.product_id.ids)])
+        by_key = {
+            (stat.product_id.id, stat.analytic_account_id.id): stat
+            for stat in stats
+        }
+        result = {}
+        for task in tasks:
+            stat = by_key.get((task.product_id.id, task.analytic_account_id.id))
+            if not stat or stat.sample_count < MIN_STORE_SAMPLES:
+                stat = by_key.get((task.product_id.id, False)) or stat
+            if stat:
+                result[task.id] = stat[measure]
+        return result
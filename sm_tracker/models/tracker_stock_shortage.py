@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 
+from collections import defaultdict
+
 from odoo import models, fields, api, _
+from odoo.tools import create_index
+import logging
+
+_logger = logging.getLogger(__name__)
 
 
 class TrackerStockShortage(models.Model):
@@ -13,6 +19,7 @@ class TrackerStockShortage(models.Model):
         'tracker.project',
         string='Proyecto',
         required=True,
+        index=True,
         ondelete='cascade',
         check_company=False
     )
@@ -21,6 +28,7 @@ class TrackerStockShortage(models.Model):
         'product.product',
         string='Producto',
         required=True,
+        index=True,
         check_company=False
     )
     
@@ -51,9 +59,206 @@ class TrackerStockShortage(models.Model):
         check_company=False
     )
     
+    location_id = fields.Many2one(
+        'stock.location',
+        string='Ubicación de Stock',
+        related='warehouse_id.lot_stock_id',
+        store=True,
+        index=True,
+        help='Ubicación donde se consulta la existencia del producto'
+    )
+    
+    project_state = fields.Selection(
+        related='project_id.state',
+        string='Estado Proyecto',
+        store=True,
+        index=True,
+        readonly=True
+    )
+    
+    needs_refresh = fields.Boolean(
+        string='Pendiente de Actualizar',
+        default=False,
+        index=True,
+        copy=False,
+        help='Marcado cuando cambió la existencia del producto en la ubicación; lo procesa el cron de abasto'
+    )
+    
     company_id = fields.Many2one(
         'res.company',
         string='Compañía',
         default=lambda self: self.env.company,
         required=False
-    )
\ No newline at end of file
+    )
+    
+    def init(self):
+        # Índice inverso producto/ubicación -> proyectos abiertos usado al marcar cambios de stock
+        create_index(
+            self._cr,
+            'tracker_stock_shortage_product_location_index',
+            self._table,
+            ['product_id', 'location_id'],
+            where="project_state NOT IN ('delivered', 'cancel')",
+        )
+    
+    @api.model
+    def _sync_project_shortage(self, project, analytic_account, moves):
+        """Sincronizar los faltantes de un proyecto (ver _sync_projects_shortage)"""
+        return self._sync_projects_shortage([(project, analytic_account, moves)])
+    
+    @api.model
+    def _sync_projects_shortage(self, entries):
+        """Sincronizar los faltantes de varios proyectos con sus movimientos pendientes
+        
+        entries es una lista de tuplas (proyecto, tienda, movimientos). Consulta
+        las existencias con una sola agrupación sobre stock.quant por
+        (ubicación, producto) para todos los proyectos, crea los registros
+        nuevos en un solo create() y solo actualiza o borra los existentes que
+        cambiaron.
+        """
+        plans = []
+        location_ids = set()
+        product_ids = set()
+        for project, analytic_account, moves in entries:
+            warehouse = analytic_account.warehouse_id
+            if not warehouse:
+                _logger.warning('⚠ Tienda %s no tiene almacén configurado, no se puede calcular abasto', 
+                              analytic_account.name)
+                continue
+            
+            # Ubicación de stock del almacén (donde está el inventario físico)
+            stock_location = warehouse.lot_stock_id
+            if not stock_location:
+                _logger.warning('⚠ Almacén %s no tiene ubicación de stock configurada', warehouse.name)
+                continue
+            
+            # Demanda por producto almacenable (primer movimiento de cada producto)
+            demand_by_product = {}
+            for move in moves:
+                product = move.product_id
+                if product and product.type == 'product' and product.id not in demand_by_product:
+                    demand_by_product[product.id] = move.product_uom_qty
+            
+            plans.append((project, analytic_account, warehouse, stock_location, demand_by_product))
+            if demand_by_product:
+                location_ids.add(stock_location.id)
+                product_ids.update(demand_by_product)
+        
+        if not plans:
+            return self.browse()
+        
+        available = {}
+        if product_ids:
+            groups = self.env['stock.quant'].sudo()._read_group(
+                [('product_id', 'in', list(product_ids)), ('location_id', 'in', list(location_ids))],
+                ['location_id', 'product_id'],
+                ['quantity:sum'],
+            )
+            available = {(location.id, product.id): quantity for location, product, quantity in groups}
+        
+        project_ids = [plan[0].id for plan in plans]
+        existing = self.search([('project_id', 'in', project_ids)])
+        existing_by_key = {(shortage.project_id.id, shortage.product_id.id): shortage for shortage in existing}
+        
+        vals_list = []
+        to_unlink = self.browse()
+        for project, analytic_account, warehouse, stock_location, demand_by_product in plans:
+            for product_id, demand_qty in demand_by_product.items():
+                available_qty = available.get((stock_location.id, product_id), 0.0)
+                state = 'sin_abasto' if available_qty <= 0 else 'con_abasto'
+                shortage = existing_by_key.get((project.id, product_id))
+                if shortage:
+                    vals = {
+                        'demand_qty': demand_qty,
+                        'available_qty': available_qty,
+                        'state': state,
+                        'warehouse_id': warehouse.id,
+                        'analytic_account_id': analytic_account.id,
+                    }
+                    changed = {
+                        key: value for key, value in vals.items()
+                        if (shortage[key].id if key.endswith('_id') else shortage[key]) != value
+                    }
+                    if changed:
+                        shortage.write(changed)
+                elif state == 'sin_abasto':
+                    # Solo se registra el producto si NO hay existencia en stock.quant
+                    vals_list.append({
+                        'project_id': project.id,
+                        'product_id': product_id,
+                        'demand_qty': demand_qty,
+                        'available_qty': available_qty,
+                        'state': state,
+                        'warehouse_id': warehouse.id,
+                        'analytic_account_id': analytic_account.id,
+                    })
+            
+            # Productos que ya no tienen movimientos pendientes
+            to_unlink |= existing.filtered(
+                lambda s: s.project_id == project and s.product_id.id not in demand_by_product
+            )
+        
+        if to_unlink:
+            to_unlink.unlink()
+        if vals_list:
+            self.create(vals_list)
+        
+        _logger.debug('Abasto sincronizado para %d proyecto(s): %d nuevo(s) sin abasto', 
+                    len(plans), len(vals_list))
+        return self.search([('project_id', 'in', project_ids)])
+    
+    @api.model
+    def _mark_for_refresh(self, products, locations):
+        """Marcar los faltantes de proyectos abiertos afectados por un cambio de stock"""
+        if not products or not locations:
+            return 0
+        shortages = self.sudo().search([
+            ('product_id', 'in', products.ids),
+            ('location_id', 'in', locations.ids),
+            ('project_state', 'not in', ['delivered', 'cancel']),
+            ('needs_refresh', '=', False),
+        ])
+        if shortages:
+            shortages.write({'needs_refresh': True})
+        return len(shortages)
+    
+    @api.model
+    def _cron_refresh_shortage(self, batch_size=5000):
+        """Actualizar en lote los faltantes marcados, una agrupación de quants por ubicación"""
+        shortages = self.sudo().search([('needs_refresh', '=', True)], limit=batch_size)
+        if not shortages:
+            return
+        
+        by_location = defaultdict(lambda: self.sudo().browse())
+        for shortage in shortages:
+            by_location[shortage.location_id] |= shortage
+        
+        Quant = self.env['stock.quant'].sudo()
+        for location, rows in by_location.items():
+            updates = defaultdict(lambda: self.sudo().browse())
+            if not location:
+                updates[None] = rows
+            else:
+                groups = Quant._read_group(
+                    [('product_id', 'in', rows.product_id.ids), ('location_id', '=', location.id)],
+                    ['product_id'],
+                    ['quantity:sum'],
+                )
+                available_by_product = {product.id: quantity for product, quantity in groups}
+                for row in rows:
+                    available_qty = available_by_product.get(row.product_id.id, 0.0)
+                    state = 'sin_abasto' if available_qty <= 0 else 'con_abasto'
+                    updates[(state, available_qty)] |= row
+            
+            # Un write por combinación de estado/cantidad en vez de uno por registro
+            for key, records in updates.items():
+                vals = {'needs_refresh': False}
+                if key:
+                    vals.update({'state': key[0], 'available_qty': key[1]})
+                records.write(vals)
+        
+        _logger.debug('Abasto actualizado para %d registro(s)', len(shortages))
+        
+        # Quedan registros pendientes: volver a ejecutar el cron en cuanto sea posible
+        if len(shortages) == batch_size:
+            self.env.ref('sm_tracker.ir_cron_tracker_refresh_shortage')._trigger()
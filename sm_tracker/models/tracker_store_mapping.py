@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TrackerStoreMapping(models.Model):
+    """Tienda (cuenta analítica) de cada origen de órdenes.
+
+    Los administradores asignan la tienda de cada punto de venta, equipo de
+    ventas o almacén. La resolución se guarda en caché (ormcache) por origen;
+    solo la invalidan los cambios que la afectan (asignaciones, cuenta
+    analítica del punto de venta, almacén de la tienda).
+    """
+    _name = 'tracker.store.mapping'
+    _description = 'Tienda por Origen de Órdenes'
+    _order = 'pos_config_id, team_id, warehouse_id'
+    _rec_name = 'analytic_account_id'
+
+    pos_config_id = fields.Many2one(
+        'pos.config',
+        string='Punto de Venta',
+        ondelete='cascade'
+    )
+
+    team_id = fields.Many2one(
+        'crm.team',
+        string='Equipo de Ventas',
+        ondelete='cascade'
+    )
+
+    warehouse_id = fields.Many2one(
+        'stock.warehouse',
+        string='Almacén',
+        ondelete='cascade'
+    )
+
+    analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string='Tienda',
+        required=True,
+        ondelete='cascade'
+    )
+
+    _sql_constraints = [
+        ('pos_config_uniq', 'unique(pos_config_id)', 'El punto de venta ya tiene una tienda asignada.'),
+        ('team_uniq', 'unique(team_id)', 'El equipo de ventas ya tiene una tienda asignada.'),
+        ('warehouse_uniq', 'unique(warehouse_id)', 'El almacén ya tiene una tienda asignada.'),
+    ]
+
+    @api.constrains('pos_config_id', 'team_id', 'warehouse_id')
+    def _check_single_origin(self):
+        for record in self:
+            origins = [record.pos_config_id, record.team_id, record.warehouse_id]
+            if len([origin for origin in origins if origin]) != 1:
+                raise ValidationError(_(
+                    'Cada asignación debe indicar solo uno: punto de venta, equipo de ventas o almacén.'
+                ))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(TrackerStoreMapping, self).create(vals_list)
+        self._clear_store_cache()
+        return records
+
+    def write(self, vals):
+        res = super(TrackerStoreMapping, self).write(vals)
+        self._clear_store_cache()
+        return res
+
+    def unlink(self):
+        res = super(TrackerStoreMapping, self).unlink()
+        self._clear_store_cache()
+        return res
+
+    @api.model
+    def _clear_store_cache(self):
+        self.env.registry.clear_cache()
+
+    @api.model
+    @tools.ormcache('config_id')
+    def _get_pos_config_store(self, config_id):
+        """Tienda asignada a un punto de venta (asignación o config.analytic_account_id)"""
+        mapping = self.sudo().search([('pos_config_id', '=', config_id)], limit=1)
+        if mapping:
+            return mapping.analytic_account_id.id
+        config = self.env['pos.config'].sudo().browse(config_id)
+        if 'analytic_account_id' in config._fields and config.analytic_account_id:
+            return config.analytic_account_id.id
+        return False
+
+    @api.model
+    def _get_pos_config_fallback_store(self, config):
+        """Tienda de respaldo por nombre de un punto de venta sin tienda asignada
+
+        No se guarda en caché: así crear o renombrar cuentas analíticas no
+        obliga a invalidarla. Solo se usa mientras el punto de venta no tenga
+        asignación.
+        """
+        Analytic = self.env['account.analytic.account'].sudo()
+        _logger.debug('Punto de venta %s sin tienda asignada, se usa búsqueda por nombre', config.name)
+        # Buscar cuenta analítica por nombre del POS
+        fallback = Analytic.search([('name', 'ilike', config.name)], limit=1)
+        if not fallback:
+            # Cualquier cuenta analítica activa con "POS" o "TIENDA"
+            fallback = Analytic.search([
+                '|', '|',
+                ('name', 'ilike', 'POS'),
+                ('name', 'ilike', 'TIENDA'),
+                ('name', 'ilike', 'PUNTO')
+            ], limit=1)
+        if not fallback:
+            # Tomar la primera cuenta analítica disponible
+            fallback = Analytic.search([], limit=1)
+        return fallback
+
+    @api.model
+    @tools.ormcache('team_id', 'warehouse_id')
+    def _get_sale_store(self, team_id, warehouse_id):
+        """Tienda de una venta según su equipo de ventas o su almacén"""
+        if team_id:
+            mapping = self.sudo().search([('team_id', '=', team_id)], limit=1)
+            if mapping:
+                return mapping.analytic_account_id.id
+        if warehouse_id:
+            mapping = self.sudo().search([('warehouse_id', '=', warehouse_id)], limit=1)
+            if mapping:
+                return mapping.analytic_account_id.id
+            # Tienda configurada con ese almacén en la cuenta analítica
+            analytic = self.env['account.analytic.account'].sudo().search([
+                ('warehouse_id', '=', warehouse_id),
+            ], limit=1)
+            if analytic:
+                return analytic.id
+        return False
+
+    @api.model
+    def action_suggest_pos_mappings(self):
+        """Crear asignaciones para los puntos de venta que aún no tienen, con la tienda que se usaría hoy"""
+        mapped = self.search([('pos_config_id', '!=', False)]).pos_config_id
+        vals_list = []
+        for config in self.env['pos.config'].search([('id', 'not in', mapped.ids)]):
+            store_id = self._get_pos_config_store(config.id) or self._get_pos_config_fallback_store(config).id
+            if store_id:
+                vals_list.append({
+                    'pos_config_id': config.id,
+                    'analytic_account_id': store_id,
+                })
+        if vals_list:
+            self.create(vals_list)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
@@ -2,6 +2,7 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import create_index
 
 
 class TrackerTask(models.Model):
@@ -28,6 +29,7 @@ class TrackerTask(models.Model):
         'product.product',
         string='Servicio',
         required=True,
+        index=True,
         domain=[('type', '=', 'service')],
         tracking=True,
         readonly=True
@@ -59,7 +61,7 @@ class TrackerTask(models.Model):
         'hr.employee',
         string='Operario Asignado',
         tracking=True,
-        domain="['&', ('tracker_analytic_account_operario_ids', 'in', [analytic_account_id]), ('tracker_product_ids', 'in', [product_id])]",
+        domain="[('tracker_eligibility_ids', 'any', [('analytic_account_id', '=', analytic_account_id), ('product_id', '=', product_id)])]",
         help='Empleado responsable de ejecutar esta tarea. Debe tener la tienda y el servicio asignados.'
     )
     
@@ -77,7 +79,7 @@ class TrackerTask(models.Model):
         ('paused', 'Pausado'),
         ('done', 'Terminado'),
         ('cancel', 'Cancelado'),
-    ], string='Estado', default='pending', required=True, tracking=True)
+    ], string='Estado', default='pending', required=True, tracking=True, index=True)
     
     timesheet_ids = fields.One2many(
         'tracker.timesheet',
@@ -92,6 +94,12 @@ class TrackerTask(models.Model):
         help='Total de horas trabajadas en esta tarea'
     )
     
+    elapsed_hours = fields.Float(
+        string='Horas Transcurridas',
+        compute='_compute_elapsed_hours',
+        help='Horas totales incluyendo el tiempo en curso del registro activo'
+    )
+    
     expected_hours = fields.Float(
         string='Duración Esperada',
         help='Horas estimadas para completar la tarea'
@@ -148,6 +156,13 @@ class TrackerTask(models.Model):
         help='Hora de inicio del registro actual'
     )
     
+    def init(self):
+        """Índices compuestos para los filtros más usados del tracker"""
+        # Tareas del operario por estado (kanban y regla por operario)
+        create_index(self._cr, 'tracker_task_employee_state_index', self._table, ['employee_id', 'state'])
+        # Tareas de la tienda por estado (regla por tienda)
+        create_index(self._cr, 'tracker_task_store_state_index', self._table, ['analytic_account_id', 'state'])
+    
     @api.depends('quantity', 'quantity_done')
     def _compute_quantity_remaining(self):
         for record in self:
@@ -158,6 +173,22 @@ class TrackerTask(models.Model):
         for record in self:
             record.total_hours = sum(record.timesheet_ids.mapped('hours'))
     
+    @api.depends('total_hours', 'active_timesheet_id.elapsed_hours')
+    def _compute_elapsed_hours(self):
+        for record in self:
+            # Solo el registro activo suma tiempo en curso; el resto ya está en total_hours
+            running = record.active_timesheet_id
+            live_hours = running.elapsed_hours - running.hours if running else 0.0
+            record.elapsed_hours = record.total_hours + live_hours
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        tasks = super(TrackerTask, self).create(vals_list)
+        # Las tareas nuevas sin operario entran a la asignación automática
+        if any(not task.employee_id for task in tasks):
+            self.env['tracker.task.scheduler']._trigger()
+        return tasks
+    
     def write(self, vals):
         # Validar cambio de empleado en tareas iniciadas
         if 'employee_id' in vals:
@@ -185,15 +216,36 @@ class TrackerTask(models.Model):
                     if record.project_id and record.project_id.state in ['pending', 'unstarted']:
                         record.project_id.write({'state': 'processing'})
         
-        return super(TrackerTask, self).write(vals)
+        res = super(TrackerTask, self).write(vals)
+        
+        # Un operario que termina (o suelta) una tarea libera cola para las pendientes
+        if vals.get('state') in ('done', 'cancel') or ('employee_id' in vals and not vals['employee_id']):
+            self.env['tracker.task.scheduler']._trigger()
+        
+        return res
+    
+    def action_auto_assign(self):
+        """Asignar las tareas seleccionadas sin operario con el balanceo de carga"""
+        Scheduler = self.env['tracker.task.scheduler']
+        tasks = Scheduler._acquire_unassigned(self.analytic_account_id.ids, self.ids)
+        assigned = Scheduler._assign_tasks(tasks)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Asignación automática'),
+                'message': _('%s de %s tarea(s) asignadas.') % (len(assigned), len(self)),
+                'type': 'success' if assigned else 'warning',
+                'sticky': False,
+            }
+        }
     
     @api.onchange('product_id')
     def _onchange_product_id(self):
         if self.product_id:
             self.name = self.product_id.name
     
-    def action_start_task(self):
-        """Abrir wizard para validar NIP del operario"""
+    def _check_can_start(self):
         for record in self:
             if record.state not in ['ready', 'pending', 'paused']:
                 raise UserError(_('Solo se puede iniciar una tarea en estado Listo, Pendiente o Pausado.'))
@@ -207,132 +259,228 @@ class TrackerTask(models.Model):
             
             if not record.employee_id:
                 raise UserError(_('Debe asignar un operario antes de iniciar la tarea.'))
-            
-            # Abrir wizard para validar NIP
-            return {
-                'name': _('Validar NIP del Operario'),
-                'type': 'ir.actions.act_window',
-                'res_model': 'tracker.task.pin.wizard',
-                'view_mode': 'form',
-                'target': 'new',
-                'context': {
-                    'default_task_id': record.id,
-                }
-            }
     
-    def _start_task_internal(self):
-        """Método interno para iniciar la tarea (después de validar NIP)"""
+    def _check_can_pause(self):
         for record in self:
-            current_time = fields.Datetime.now()
-            
-            timesheet_vals = {
-                'task_id': record.id,
-                'employee_id': record.employee_id.id,
-                'analytic_account_id': record.analytic_account_id.id,
-                'name': record.name,
-                'date': fields.Date.today(),
-                'start_time': current_time,
-                'state': 'running'
+            if record.state != 'in_progress':
+                raise UserError(_('Solo se puede pausar una tarea en progreso.'))
+    
+    def _check_can_complete(self):
+        for record in self:
+            if record.state not in ['in_progress', 'paused']:
+                raise UserError(_('Solo se puede completar una tarea en progreso o pausada.'))
+    
+    def _check_single_operator(self):
+        """El NIP es de un operario: las acciones en lote solo aplican a tareas del mismo operario"""
+        if len(self.employee_id) > 1:
+            raise UserError(_(
+                'Las tareas seleccionadas tienen distintos operarios. '
+                'Seleccione solo tareas del mismo operario.'
+            ))
+    
+    def _check_operator_eligible(self):
+        """El operario debe seguir teniendo la tienda y el servicio de cada tarea"""
+        Eligibility = self.env['tracker.operator.eligibility'].sudo()
+        for record in self:
+            if not Eligibility._is_eligible(record.employee_id.id, record.analytic_account_id.id,
+                                            record.product_id.id):
+                raise UserError(_(
+                    'El operario %s no tiene asignado el servicio %s en la tienda %s.'
+                ) % (record.employee_id.name, record.product_id.display_name,
+                     record.analytic_account_id.name))
+    
+    def _open_pin_wizard(self, title, action_type):
+        return {
+            'name': title,
+            'type': 'ir.actions.act_window',
+            'res_model': 'tracker.task.pin.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_task_id': self[:1].id,
+                'default_task_ids': [(6, 0, self.ids)],
+                'action_type': action_type,
             }
-            timesheet = self.env['tracker.timesheet'].create(timesheet_vals)
-            
-            record.write({
-                'state': 'in_progress',
-                'active_timesheet_id': timesheet.id,
-                'current_start_time': current_time
-            })
-            
-            # Cambiar proyecto a 'processing' si está en 'pending' o 'unstarted'
-            if record.project_id.state in ['pending', 'unstarted']:
-                record.project_id.write({'state': 'processing'})
+        }
+    
+    def _check_operator_pin(self, pin):
+        """Validar el NIP contra el operario asignado a las tareas"""
+        self._check_single_operator()
+        employee = self.employee_id.sudo()
+        if not employee:
+            raise UserError(_('Las tareas seleccionadas no tienen operario asignado.'))
+        
+        # Validar que el empleado tenga PIN configurado (campo 'pin' de Odoo)
+        if not employee.pin:
+            raise UserError(_(
+                'El operario %s no tiene un PIN configurado. '
+                'Por favor, configure el PIN en los datos del empleado (pestaña HR Settings).'
+            ) % employee.name)
+        
+        # Bloqueo temporal tras varios PIN incorrectos seguidos
+        now = fields.Datetime.now()
+        if employee.tracker_pin_locked_until and employee.tracker_pin_locked_until > now:
+            minutes = int((employee.tracker_pin_locked_until - now).total_seconds() // 60) + 1
+            raise UserError(_(
+                'Demasiados intentos de PIN incorrectos para %s. Intente nuevamente en %s minuto(s).'
+            ) % (employee.name, minutes))
+        
+        # Validar que el PIN sea correcto
+        if pin != employee.pin:
+            employee._register_pin_failure()
+            raise ValidationError(_('PIN incorrecto. Verifique e intente nuevamente.'))
+        
+        if employee.tracker_pin_failed_attempts:
+            employee.tracker_pin_failed_attempts = 0
+    
+    def _execute_action(self, action_type):
+        """Ejecutar start, pause o complete (después de validar NIP)"""
+        if action_type == 'start':
+            return self._start_task_internal()
+        elif action_type == 'pause':
+            return self._execute_pause()
+        elif action_type == 'complete':
+            return self._execute_complete()
+        raise UserError(_('Acción no válida: %s') % action_type)
+    
+    def _kiosk_execute(self, action_type, pin):
+        """Validar y ejecutar una acción del kiosco en una sola transacción"""
+        self._validate_and_execute(action_type, pin)
+        return self._kiosk_task_data()
+    
+    def _validate_and_execute(self, action_type, pin):
+        """Bloquear las tareas, revalidarlas con el NIP y ejecutar la acción
+        
+        Lo usan el kiosco y el wizard de NIP. Acepta varias tareas del mismo
+        operario. Bloquea las filas de las tareas para que dos clientes
+        simultáneos no creen dos registros de tiempo; el segundo ve el estado
+        ya cambiado.
+        """
+        checks = {
+            'start': self._check_can_start,
+            'pause': self._check_can_pause,
+            'complete': self._check_can_complete,
+        }
+        if action_type not in checks or not self:
+            raise UserError(_('Acción no válida: %s') % action_type)
+        
+        self.env.cr.execute('SELECT id FROM tracker_task WHERE id IN %s FOR UPDATE', (tuple(self.ids),))
+        self.invalidate_recordset()
+        
+        checks[action_type]()
+        if action_type == 'start':
+            self._check_operator_eligible()
+        self._check_operator_pin(pin)
+        return self._execute_action(action_type)
+    
+    def _kiosk_task_data(self):
+        """Datos mínimos de las tareas para la pantalla del kiosco"""
+        return [{
+            'id': task.id,
+            'name': task.name,
+            'project': task.project_id.name,
+            'partner': task.partner_id.name or '',
+            'employee': task.employee_id.name or '',
+            'employee_id': task.employee_id.id,
+            'store': task.analytic_account_id.name or '',
+            'state': task.state,
+            'quantity': task.quantity,
+            'elapsed_hours': task.elapsed_hours,
+            'running': bool(task.active_timesheet_id),
+        } for task in self]
+    
+    def action_start_task(self):
+        """Abrir wizard para validar NIP del operario (una o varias tareas)"""
+        self._check_can_start()
+        self._check_single_operator()
+        
+        # Abrir wizard de validación de NIP
+        return self._open_pin_wizard(_('Validar NIP del Operario'), 'start')
+    
+    def _start_task_internal(self):
+        """Método interno para iniciar las tareas (después de validar NIP)
+        
+        Acepta varias tareas: un solo create() de registros de tiempo y una
+        escritura por proyecto afectado.
+        """
+        if not self:
+            return True
+        current_time = fields.Datetime.now()
+        today = fields.Date.today()
+        
+        timesheets = self.env['tracker.timesheet'].create([{
+            'task_id': record.id,
+            'employee_id': record.employee_id.id,
+            'analytic_account_id': record.analytic_account_id.id,
+            'name': record.name,
+            'date': today,
+            'start_time': current_time,
+            'state': 'running'
+        } for record in self])
+        
+        self.write({
+            'state': 'in_progress',
+            'current_start_time': current_time
+        })
+        for record, timesheet in zip(self, timesheets):
+            record.active_timesheet_id = timesheet
+        
+        # Cambiar proyecto a 'processing' si está en 'pending' o 'unstarted'
+        projects = self.project_id
+        projects.filtered(lambda p: p.state in ['pending', 'unstarted']).write({'state': 'processing'})
+        projects._freeze_hours_unassigned(current_time)
         
         return True
     
     def action_pause_task(self):
         """Abrir wizard para validar NIP del operario antes de pausar"""
-        for record in self:
-            if record.state != 'in_progress':
-                raise UserError(_('Solo se puede pausar una tarea en progreso.'))
-            
-            # Abrir wizard de validación de NIP
-            return {
-                'name': _('Validar NIP para Pausar'),
-                'type': 'ir.actions.act_window',
-                'res_model': 'tracker.task.pin.wizard',
-                'view_mode': 'form',
-                'target': 'new',
-                'context': {
-                    'default_task_id': record.id,
-                    'action_type': 'pause',  # Indicar que es para pausar
-                }
-            }
+        self._check_can_pause()
+        self._check_single_operator()
+        
+        # Abrir wizard de validación de NIP
+        return self._open_pin_wizard(_('Validar NIP para Pausar'), 'pause')
     
     def _execute_pause(self):
-        """Ejecutar pausa de la tarea (llamado desde wizard después de validar NIP)"""
-        for record in self:
-            if record.active_timesheet_id:
-                record.active_timesheet_id.write({
-                    'end_time': fields.Datetime.now(),
-                    'state': 'stopped'
-                })
-            
-            record.write({
-                'state': 'paused',
-                'active_timesheet_id': False,
-                'current_start_time': False
-            })
+        """Ejecutar pausa de las tareas (llamado después de validar NIP)"""
+        self._stop_active_timesheets()
+        self.write({
+            'state': 'paused',
+            'active_timesheet_id': False,
+            'current_start_time': False
+        })
         
         return True
     
+    def _stop_active_timesheets(self):
+        """Cerrar los registros de tiempo activos de todas las tareas con un solo write()"""
+        timesheets = self.active_timesheet_id
+        if timesheets:
+            timesheets.write({
+                'end_time': fields.Datetime.now(),
+                'state': 'stopped'
+            })
+    
     def action_complete_task(self):
         """Abrir wizard para validar NIP del operario antes de finalizar"""
-        for record in self:
-            if record.state not in ['in_progress', 'paused']:
-                raise UserError(_('Solo se puede completar una tarea en progreso o pausada.'))
-            
-            # Abrir wizard de validación de NIP
-            return {
-                'name': _('Validar NIP para Finalizar'),
-                'type': 'ir.actions.act_window',
-                'res_model': 'tracker.task.pin.wizard',
-                'view_mode': 'form',
-                'target': 'new',
-                'context': {
-                    'default_task_id': record.id,
-                    'action_type': 'complete',  # Indicar que es para finalizar
-                }
-            }
+        self._check_can_complete()
+        self._check_single_operator()
+        
+        # Abrir wizard de validación de NIP
+        return self._open_pin_wizard(_('Validar NIP para Finalizar'), 'complete')
     
     def _execute_complete(self):
-        """Ejecutar finalización de la tarea (llamado desde wizard después de validar NIP)"""
+        """Ejecutar finalización de las tareas (llamado después de validar NIP)"""
+        self._stop_active_timesheets()
+        self.write({
+            'state': 'done',
+            'active_timesheet_id': False,
+            'current_start_time': False,
+        })
         for record in self:
-            if record.active_timesheet_id:
-                record.active_timesheet_id.write({
-                    'end_time': fields.Datetime.now(),
-                    'state': 'stopped'
-                })
-            
-            record.write({
-                'state': 'done',
-                'active_timesheet_id': False,
-                'current_start_time': False,
-                'quantity_done': record.quantity
-            })
-            
-            # Verificar si todas las tareas del proyecto están terminadas
-            project = record.project_id
-            if project.state == 'processing':
-                # Obtener solo tareas con estado válido (no NULL, no cancel)
-                valid_tasks = project.task_ids.filtered(
-                    lambda t: t.state and t.state != 'cancel'
-                )
-                
-                # Si hay tareas válidas y todas están terminadas
-                if valid_tasks and all(t.state == 'done' for t in valid_tasks):
-                    project.write({
-                        'state': 'pending_delivery',
-                        'completion_date': fields.Datetime.now()
-                    })
+            record.quantity_done = record.quantity
+        
+        # Verificar una sola vez por proyecto si todas sus tareas están terminadas
+        self.project_id._check_all_tasks_done()
         
         return True
     
@@ -15,6 +15,13 @@ class TrackerTaskPinWizard(models.TransientModel):
         readonly=True
     )
     
+    task_ids = fields.Many2many(
+        'tracker.task',
+        string='Tareas',
+        readonly=True,
+        help='Tareas del mismo operario para iniciar, pausar o finalizar en lote'
+    )
+    
     employee_id = fields.Many2one(
         'hr.employee',
         string='Operario',
@@ -37,27 +44,13 @@ class TrackerTaskPinWizard(models.TransientModel):
         """Validar NIP y ejecutar la acción correspondiente"""
         self.ensure_one()
         
-        # Validar que el empleado tenga PIN configurado (campo 'pin' de Odoo)
-        if not self.employee_id.pin:
-            raise UserError(_(
-                'El operario %s no tiene un PIN configurado. '
-                'Por favor, configure el PIN en los datos del empleado (pestaña HR Settings).'
-            ) % self.employee_id.name)
-        
-        # Validar que el PIN sea correcto
-        if self.pin != self.employee_id.pin:
-            raise ValidationError(_('PIN incorrecto. Verifique e intente nuevamente.'))
+        tasks = self.task_ids or self.task_id
         
         # Obtener el tipo de acción del contexto
         action_type = self.env.context.get('action_type', 'start')
         
-        # Ejecutar la acción correspondiente
-        if action_type == 'start':
-            self.task_id._start_task_internal()
-        elif action_type == 'pause':
-            self.task_id._execute_pause()
-        elif action_type == 'complete':
-            self.task_id._execute_complete()
+        # Bloquear, revalidar estado, elegibilidad y NIP, y ejecutar en una sola operación
+        tasks._validate_and_execute(action_type, self.pin)
         
         return {'type': 'ir.actions.act_window_close'}
     
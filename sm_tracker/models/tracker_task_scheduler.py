@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.tools import str2bool
+import logging
+
+_logger = logging.getLogger(__name__)
+
+AUTO_ASSIGN_PARAM = 'sm_tracker.auto_assign_enabled'
+MAX_QUEUE_HOURS_PARAM = 'sm_tracker.auto_assign_max_queue_hours'
+ASSIGNABLE_STATES = ['pending', 'ready']
+QUEUED_STATES = ['pending', 'ready', 'in_progress', 'paused']
+# Duración supuesta para servicios sin historial ni duración esperada
+DEFAULT_TASK_HOURS = 1.0
+
+
+class TrackerTaskScheduler(models.AbstractModel):
+    """Asignación automática de tareas a operarios.
+
+    Por tienda, las tareas sin operario se ordenan por fecha prometida y se
+    asignan al operario elegible (tienda y servicio) con menos horas en cola.
+    La cola de cada operario tiene un tope: lo que no cabe queda sin asignar
+    hasta que alguien termine una tarea, lo que vuelve a disparar el cron.
+    """
+    _name = 'tracker.task.scheduler'
+    _description = 'Asignación Automática de Tareas del Tracker'
+
+    @api.model
+    def _is_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(AUTO_ASSIGN_PARAM, 'False'))
+
+    @api.model
+    def _get_max_queue_hours(self):
+        return float(self.env['ir.config_parameter'].sudo().get_param(MAX_QUEUE_HOURS_PARAM, 8.0))
+
+    @api.model
+    def _trigger(self):
+        """Programar una pasada del cron si la asignación automática está activa"""
+        if not self._is_enabled():
+            return False
+        cron = self.env.ref('sm_tracker.ir_cron_tracker_auto_assign', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return True
+
+    @api.model
+    def _cron_auto_assign(self):
+        """Asignar las tareas sin operario de todas las tiendas"""
+        if not self._is_enabled():
+            return 0
+        Task = self.env['tracker.task'].sudo()
+        groups = Task._read_group(
+            [('employee_id', '=', False), ('state', 'in', ASSIGNABLE_STATES)],
+            ['analytic_account_id'], ['__count'],
+        )
+        store_ids = [store.id for store, count in groups if store]
+        return len(self._assign_tasks(self._acquire_unassigned(store_ids)))
+
+    @api.model
+    def _acquire_unassigned(self, store_ids, task_ids=None):
+        """Tareas sin operario, sin esperar a las que otro proceso ya tiene bloqueadas"""
+        if not store_ids:
+            return self.env['tracker.task']
+        Task = self.env['tracker.task'].sudo()
+        Task.flush_model(['employee_id', 'state', 'analytic_account_id'])
+        query = """
+            SELECT id
+              FROM tracker_task
+             WHERE employee_id IS NULL
+               AND state IN %s
+               AND analytic_account_id IN %s
+        """
+        params = [tuple(ASSIGNABLE_STATES), tuple(store_ids)]
+        if task_ids is not None:
+            query += " AND id IN %s"
+            params.append(tuple(task_ids) or (0,))
+        self.env.cr.execute(query + " FOR UPDATE SKIP LOCKED", params)
+        return Task.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _estimate_hours(self, tasks):
+        """Horas restantes estimadas por tarea: {task_id: horas}
+
+        Usa la duración esperada de la tarea si la tiene; si no, la mediana
+        histórica por unidad del servicio en la tienda. Descuenta lo ya trabajado.
+        """
+        hours_per_unit = self.env['tracker.service.duration.stat']._get_hours_per_unit(tasks)
+        estimates = {}
+        for task in tasks:
+            if task.expected_hours:
+                estimate = task.expected_hours
+            elif task.id in hours_per_unit:
+                estimate = hours_per_unit[task.id] * (task.quantity_remaining or task.quantity)
+            else:
+                estimate = DEFAULT_TASK_HOURS
+            estimates[task.id] = max(estimate - task.total_hours, 0.0)
+        return estimates
+
+    @api.model
+    def _get_eligible_employees(self, store_ids, product_ids):
+        """Operarios por (tienda, servicio): {(store_id, product_id): [employee_id, ...]}"""
+        return self.env['tracker.operator.eligibility'].sudo()._get_eligible(store_ids, product_ids)
+
+    @api.model
+    def _get_queue_hours(self, employee_ids):
+        """Horas estimadas en cola por operario: {employee_id: horas}"""
+        queued = self.env['tracker.task'].sudo().search([
+            ('employee_id', 'in', list(employee_ids)),
+            ('state', 'in', QUEUED_STATES),
+        ])
+        estimates = self._estimate_hours(queued)
+        load = defaultdict(float)
+        for task in queued:
+            load[task.employee_id.id] += estimates[task.id]
+        return load
+
+    @api.model
+    def _assign_tasks(self, tasks):
+        """Asignar tareas sin operario balanceando la cola de los operarios
+
+        Todo se lee en pocas consultas agrupadas (estimaciones, operarios
+        elegibles y cola actual) y se escribe una vez por operario.
+        """
+        tasks = tasks.filtered(lambda t: not t.employee_id and t.state in ASSIGNABLE_STATES)
+        if not tasks:
+            return tasks
+        store_ids = set(tasks.analytic_account_id.ids)
+        eligible = self._get_eligible_employees(store_ids, set(tasks.product_id.ids))
+        employee_ids = {employee_id for ids in eligible.values() for employee_id in ids}
+        load = self._get_queue_hours(employee_ids)
+        estimates = self._estimate_hours(tasks)
+        max_queue = self._get_max_queue_hours()
+
+        # Primero lo que vence antes; sin fecha prometida al final
+        ordered = tasks.sorted(lambda t: (not t.promise_date, t.promise_date or fields.Datetime.now(), t.id))
+        assignments = defaultdict(list)
+        for task in ordered:
+            candidates = eligible.get((task.analytic_account_id.id, task.product_id.id))
+            if not candidates:
+                continue
+            employee_id = min(candidates, key=lambda emp_id: (load[emp_id], emp_id))
+            # Un operario sin cola siempre recibe trabajo, aunque la tarea supere el tope
+            if load[employee_id] and load[employee_id] + estimates[task.id] > max_queue:
+                continue
+            load[employee_id] += estimates[task.id]
+            assignments[employee_id].append(task.id)
+
+        Task = self.env['tracker.task'].sudo()
+        assigned = Task
+        for employee_id, task_ids in assignments.items():
+            employee_tasks = Task.browse(task_ids)
+            employee_tasks.write({'employee_id': employee_id})
+            assigned |= employee_tasks
+        _logger.info('Asignación automática: %d de %d tarea(s) asignadas a %d operario(s)',
+                     len(assigned), len(tasks), len(assignments))
+        return assigned
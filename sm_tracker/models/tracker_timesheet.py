@@ -2,7 +2,11 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
-from datetime import datetime
+from odoo.tools import create_index
+from datetime import datetime, timedelta
+
+# Campos que cambian lo que un registro aporta al resumen diario de horas
+ROLLUP_FIELDS = {'task_id', 'employee_id', 'analytic_account_id', 'date', 'start_time', 'end_time'}
 
 
 class TrackerTimesheet(models.Model):
@@ -56,6 +60,7 @@ class TrackerTimesheet(models.Model):
     
     date = fields.Date(
         string='Fecha',
+        index=True,
         required=True,
         readonly=True,
         default=fields.Date.context_today
@@ -71,11 +76,24 @@ class TrackerTimesheet(models.Model):
         readonly=True
     )
     
+    snapshot_time = fields.Datetime(
+        string='Último Corte',
+        readonly=True,
+        help='Hasta cuándo están contadas las horas de un registro en progreso (cron de cortes)'
+    )
+    
     hours = fields.Float(
         string='Horas',
         compute='_compute_hours',
         store=True,
-        readonly=True
+        readonly=True,
+        help='Horas del intervalo cerrado: hasta la hora fin, o hasta el último corte si sigue en progreso'
+    )
+    
+    elapsed_hours = fields.Float(
+        string='Horas Transcurridas',
+        compute='_compute_elapsed_hours',
+        help='Horas hasta este momento, incluye el tiempo en curso de los registros en progreso'
     )
     
     quantity = fields.Float(
@@ -100,18 +118,53 @@ class TrackerTimesheet(models.Model):
         ('stopped', 'Detenido'),
     ], string='Estado', default='draft')
     
-    @api.depends('start_time', 'end_time')
+    def init(self):
+        """Índices compuestos para los filtros más usados del tracker"""
+        # Horas del empleado por fecha
+        create_index(self._cr, 'tracker_timesheet_employee_date_index', self._table, ['employee_id', 'date'])
+        # Horas de la tienda por fecha (regla por tienda y reportes)
+        create_index(self._cr, 'tracker_timesheet_store_date_index', self._table, ['analytic_account_id', 'date'])
+    
+    @api.depends('start_time', 'end_time', 'snapshot_time')
     def _compute_hours(self):
+        # Sin now(): un valor guardado con la hora actual queda congelado en la última escritura
         for record in self:
-            if record.start_time and record.end_time:
-                delta = record.end_time - record.start_time
-                record.hours = delta.total_seconds() / 3600.0
-            elif record.start_time and not record.end_time:
-                delta = fields.Datetime.now() - record.start_time
-                record.hours = delta.total_seconds() / 3600.0
+            closed_time = record.end_time or record.snapshot_time
+            if record.start_time and closed_time:
+                delta = closed_time - record.start_time
+                record.hours = max(delta.total_seconds() / 3600.0, 0.0)
             else:
                 record.hours = 0.0
     
+    @api.depends('start_time', 'end_time', 'hours')
+    def _compute_elapsed_hours(self):
+        now = fields.Datetime.now()
+        for record in self:
+            if record.start_time and not record.end_time:
+                delta = now - record.start_time
+                record.elapsed_hours = delta.total_seconds() / 3600.0
+            else:
+                record.elapsed_hours = record.hours
+    
+    @api.model
+    def _cron_snapshot_running_timers(self, min_minutes=15):
+        """Guardar un corte de los registros en progreso para que los totales no se atrasen
+        
+        Una sola escritura para todos los registros: las horas de tareas y proyectos se
+        recalculan en lote. Solo se cortan los que llevan más de min_minutes sin corte.
+        """
+        now = fields.Datetime.now()
+        limit_time = now - timedelta(minutes=min_minutes)
+        running = self.search([
+            ('state', '=', 'running'),
+            ('end_time', '=', False),
+            ('start_time', '<', limit_time),
+            '|', ('snapshot_time', '=', False), ('snapshot_time', '<', limit_time),
+        ])
+        if running:
+            running.write({'snapshot_time': now})
+        return len(running)
+    
     @api.constrains('hours')
     def _check_hours(self):
         for record in self:
@@ -127,19 +180,36 @@ class TrackerTimesheet(models.Model):
         ]
         
         # Si el usuario es Manager, permitir todo
-        if self.env.user.has_group('sm_tracker.group_tracker_manager'):
-            return super(TrackerTimesheet, self).write(vals)
-        
-        # Verificar si se está intentando modificar campos protegidos
-        attempting_to_modify = [field for field in protected_fields if field in vals]
+        if not self.env.user.has_group('sm_tracker.group_tracker_manager'):
+            # Verificar si se está intentando modificar campos protegidos
+            attempting_to_modify = [field for field in protected_fields if field in vals]
+            
+            if attempting_to_modify:
+                raise UserError(_(
+                    'No se pueden modificar los siguientes campos: %s. '
+                    'Solo se pueden agregar notas.' % ', '.join(attempting_to_modify)
+                ))
         
-        if attempting_to_modify:
-            raise UserError(_(
-                'No se pueden modificar los siguientes campos: %s. '
-                'Solo se pueden agregar notas.' % ', '.join(attempting_to_modify)
-            ))
+        if not ROLLUP_FIELDS.intersection(vals):
+            return super(TrackerTimesheet, self).write(vals)
         
-        return super(TrackerTimesheet, self).write(vals)
+        # Mantener el resumen diario: quitar lo que aportaban antes y sumar lo nuevo
+        Daily = self.env['tracker.hours.daily'].sudo()
+        Daily._remove_timesheets(self)
+        res = super(TrackerTimesheet, self).write(vals)
+        Daily._add_timesheets(self)
+        return res
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(TrackerTimesheet, self).create(vals_list)
+        # Normalmente se crean en progreso; solo los que ya vienen cerrados cuentan
+        self.env['tracker.hours.daily'].sudo()._add_timesheets(records)
+        return records
+    
+    def unlink(self):
+        self.env['tracker.hours.daily'].sudo()._remove_timesheets(self)
+        return super(TrackerTimesheet, self).unlink()
     
     def action_start_timer(self):
         for record in self:
@@ -0,0 +1,61 @@
+/** @odoo-module */
+
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { Component, onWillStart, onWillUnmount, useState } from "@odoo/owl";
+
+const STATE_LABELS = {
+    pending: "Pendiente",
+    processing: "Procesando",
+    pending_delivery: "Pendiente de Entrega",
+    delivered: "Entregado",
+    cancel: "Anulado",
+};
+
+export class TrackerDashboard extends Component {
+    static template = "sm_tracker.TrackerDashboard";
+
+    setup() {
+        this.rpc = useService("rpc");
+        this.action = useService("action");
+        this.stateLabels = STATE_LABELS;
+        this.state = useState({ stores: [], generatedAt: false, loading: true });
+
+        onWillStart(() => this.loadData());
+        onWillUnmount(() => clearInterval(this.interval));
+    }
+
+    async loadData() {
+        const data = await this.rpc("/sm_tracker/dashboard/data", {});
+        this.state.stores = data.stores;
+        this.state.generatedAt = data.generated_at;
+        this.state.loading = false;
+        // Refrescar con el mismo TTL del servidor: pedir antes no trae datos nuevos
+        const refreshMs = Math.max(data.ttl || 30, 10) * 1000;
+        if (refreshMs !== this.refreshMs) {
+            this.refreshMs = refreshMs;
+            clearInterval(this.interval);
+            this.interval = setInterval(() => this.loadData(), refreshMs);
+        }
+    }
+
+    openProjects(store, domain = []) {
+        this.action.doAction({
+            type: "ir.actions.act_window",
+            name: store.name,
+            res_model: "tracker.project",
+            views: [[false, "kanban"], [false, "list"], [false, "form"]],
+            domain: [["analytic_account_id", "=", store.id], ...domain],
+            context: { group_by: "state" },
+        });
+    }
+
+    openOverdue(store) {
+        this.openProjects(store, [
+            ["state", "in", ["pending", "processing", "pending_delivery"]],
+            ["overdue_bucket", "!=", "on_time"],
+        ]);
+    }
+}
+
+registry.category("actions").add("sm_tracker.tracker_dashboard", TrackerDashboard);
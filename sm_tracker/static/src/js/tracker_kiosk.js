@@ -0,0 +1,134 @@
+/** @odoo-module */
+
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { formatFloatTime } from "@web/views/fields/formatters";
+import { Component, onWillStart, onWillUnmount, useState } from "@odoo/owl";
+
+const STATE_LABELS = {
+    pending: "Pendiente",
+    ready: "Listo",
+    in_progress: "En Progreso",
+    paused: "Pausado",
+};
+
+const ACTIONS_BY_STATE = {
+    pending: ["start"],
+    ready: ["start"],
+    paused: ["start", "complete"],
+    in_progress: ["pause", "complete"],
+};
+
+/**
+ * Kiosco de taller: el operario elige una o varias de sus tareas, escribe su
+ * NIP y la acción se valida y ejecuta con una sola petición JSON, sin abrir el
+ * wizard de NIP.
+ */
+export class TrackerKiosk extends Component {
+    static template = "sm_tracker.TrackerKiosk";
+
+    setup() {
+        this.rpc = useService("rpc");
+        this.stateLabels = STATE_LABELS;
+        this.state = useState({
+            tasks: [],
+            selectedIds: [],
+            pin: "",
+            busy: false,
+            message: false,
+            error: false,
+        });
+
+        onWillStart(() => this.loadTasks());
+        this.interval = setInterval(() => this.loadTasks(), 30000);
+        onWillUnmount(() => clearInterval(this.interval));
+    }
+
+    get selectedTasks() {
+        return this.state.tasks.filter((task) => this.state.selectedIds.includes(task.id));
+    }
+
+    get selectedEmployee() {
+        const tasks = this.selectedTasks;
+        return tasks.length ? tasks[0].employee : "";
+    }
+
+    get availableActions() {
+        // Solo las acciones válidas para todas las tareas seleccionadas
+        const tasks = this.selectedTasks;
+        if (!tasks.length) {
+            return [];
+        }
+        return (ACTIONS_BY_STATE[tasks[0].state] || []).filter((action) =>
+            tasks.every((task) => (ACTIONS_BY_STATE[task.state] || []).includes(action))
+        );
+    }
+
+    isSelected(task) {
+        return this.state.selectedIds.includes(task.id);
+    }
+
+    formatHours(hours) {
+        return formatFloatTime(hours);
+    }
+
+    async loadTasks() {
+        this.state.tasks = await this.rpc("/sm_tracker/kiosk/tasks", {});
+    }
+
+    selectTask(task) {
+        const selected = this.selectedTasks;
+        if (this.isSelected(task)) {
+            this.state.selectedIds = this.state.selectedIds.filter((id) => id !== task.id);
+        } else if (selected.length && selected[0].employee_id !== task.employee_id) {
+            // El NIP es de un operario: otra persona empieza una selección nueva
+            this.state.selectedIds = [task.id];
+        } else {
+            this.state.selectedIds = [...this.state.selectedIds, task.id];
+        }
+        this.state.pin = "";
+        this.state.message = false;
+        this.state.error = false;
+    }
+
+    pressDigit(digit) {
+        this.state.pin += digit;
+    }
+
+    clearPin() {
+        this.state.pin = "";
+    }
+
+    async execute(action) {
+        const tasks = this.selectedTasks;
+        if (!tasks.length || this.state.busy) {
+            return;
+        }
+        this.state.busy = true;
+        try {
+            const result = await this.rpc("/sm_tracker/kiosk/action", {
+                task_ids: tasks.map((task) => task.id),
+                action,
+                pin: this.state.pin,
+            });
+            if (result.ok) {
+                const updated = Object.fromEntries(result.tasks.map((task) => [task.id, task]));
+                this.state.tasks = this.state.tasks
+                    .map((task) => updated[task.id] || task)
+                    .filter((task) => task.state !== "done");
+                this.state.selectedIds = [];
+                const label = STATE_LABELS[result.tasks[0].state] || "Terminado";
+                this.state.message = `${result.tasks.length} tarea(s): ${label}`;
+                this.state.error = false;
+            } else {
+                this.state.error = result.error;
+                this.state.message = false;
+            }
+        } finally {
+            this.state.pin = "";
+            this.state.busy = false;
+        }
+    }
+}
+
+registry.category("actions").add("sm_tracker.tracker_kiosk", TrackerKiosk);
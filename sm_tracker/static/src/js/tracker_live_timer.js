@@ -0,0 +1,68 @@
+/** @odoo-module */
+
+import { registry } from "@web/core/registry";
+import { formatFloatTime } from "@web/views/fields/formatters";
+import { standardFieldProps } from "@web/views/fields/standard_field_props";
+import { Component, onWillUnmount, useState } from "@odoo/owl";
+
+/**
+ * Muestra horas (float) y, si el registro está en progreso, las avanza cada
+ * segundo en el navegador. El servidor solo entrega el valor al cargar: no hay
+ * escrituras ni consultas mientras el cronómetro corre.
+ */
+export class TrackerLiveTimerField extends Component {
+    static template = "sm_tracker.TrackerLiveTimerField";
+    static props = {
+        ...standardFieldProps,
+        runningField: { type: String, optional: true },
+        runningValue: { optional: true },
+    };
+
+    setup() {
+        this.state = useState({ now: Date.now() });
+        this.base = { value: null, loadedAt: Date.now() };
+        this.interval = setInterval(() => {
+            if (this.isRunning) {
+                this.state.now = Date.now();
+            }
+        }, 1000);
+        onWillUnmount(() => clearInterval(this.interval));
+    }
+
+    get isRunning() {
+        const { record, runningField, runningValue } = this.props;
+        if (!runningField) {
+            return false;
+        }
+        const value = record.data[runningField];
+        return runningValue === undefined ? Boolean(value) : value === runningValue;
+    }
+
+    get hours() {
+        const value = this.props.record.data[this.props.name] || 0;
+        // Valor nuevo del servidor: volver a contar desde ahora
+        if (value !== this.base.value) {
+            this.base = { value, loadedAt: Date.now() };
+        }
+        if (!this.isRunning) {
+            return value;
+        }
+        return value + Math.max(this.state.now - this.base.loadedAt, 0) / 3600000;
+    }
+
+    get formattedValue() {
+        return formatFloatTime(this.hours, { displaySeconds: this.isRunning });
+    }
+}
+
+export const trackerLiveTimerField = {
+    component: TrackerLiveTimerField,
+    displayName: "Cronómetro",
+    supportedTypes: ["float"],
+    extractProps: ({ options }) => ({
+        runningField: options.running_field,
+        runningValue: options.running_value,
+    }),
+};
+
+registry.category("fields").add("tracker_live_timer", trackerLiveTimerField);
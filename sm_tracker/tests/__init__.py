@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_has_service_products
+from . import test_pending_stock_moves
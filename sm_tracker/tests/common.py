@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import TransactionCase
+
+
+class TrackerCommon(TransactionCase):
+    """Datos base del tracker: tienda, cliente, servicio y producto con BoM"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Cliente Tracker'})
+        plan = cls.env['account.analytic.plan'].create({'name': 'Tiendas'})
+        cls.store = cls.env['account.analytic.account'].create({
+            'name': 'Tienda Central',
+            'plan_id': plan.id,
+        })
+        cls.service = cls.env['product.product'].create({
+            'name': 'Corte',
+            'type': 'service',
+            'tracker_active': True,
+        })
+        cls.component = cls.env['product.product'].create({
+            'name': 'Tablero',
+            'type': 'product',
+        })
+        cls.kit = cls.env['product.product'].create({
+            'name': 'Mueble Armado',
+            'type': 'product',
+        })
+        cls.env['mrp.bom'].create({
+            'product_tmpl_id': cls.kit.product_tmpl_id.id,
+            'type': 'normal',
+            'bom_line_ids': [
+                (0, 0, {'product_id': cls.component.id, 'product_qty': 2}),
+                (0, 0, {'product_id': cls.service.id, 'product_qty': 1}),
+            ],
+        })
+
+    def _create_sale_orders(self, count, products):
+        return self.env['sale.order'].create([{
+            'partner_id': self.partner.id,
+            'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': 1}) for product in products],
+        } for i in range(count)])
+
+    def _get_pos_session(self):
+        """Sesión POS abierta para crear órdenes de prueba"""
+        session = self.env['pos.session'].search([
+            ('config_id.name', '=', 'POS Tracker'),
+            ('state', '=', 'opened'),
+        ], limit=1)
+        if not session:
+            config = self.env['pos.config'].create({'name': 'POS Tracker'})
+            session = self.env['pos.session'].create({
+                'config_id': config.id,
+                'user_id': self.env.uid,
+            })
+        return session
+
+    def _create_pos_orders(self, count, products):
+        session = self._get_pos_session()
+        return self.env['pos.order'].create([{
+            'session_id': session.id,
+            'partner_id': self.partner.id,
+            'amount_tax': 0.0,
+            'amount_total': 0.0,
+            'amount_paid': 0.0,
+            'amount_return': 0.0,
+            'lines': [(0, 0, {
+                'product_id': product.id,
+                'qty': 1,
+                'price_unit': 0.0,
+                'price_subtotal': 0.0,
+                'price_subtotal_incl': 0.0,
+            }) for product in products],
+        } for i in range(count)])
+
+    def _warm_up(self, func):
+        """Ejecutar func una vez (p. ej. para llenar el índice de servicios) y vaciar la caché"""
+        func()
+        self.env.flush_all()
+        self.env.invalidate_all()
+
+    def _count_queries(self, func):
+        """Número de consultas SQL que ejecuta func, con la caché vacía"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        start = self.env.cr.sql_log_count
+        func()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - start
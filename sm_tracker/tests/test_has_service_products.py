@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import tagged
+
+from .common import TrackerCommon
+
+
+@tagged('post_install', '-at_install')
+class TestHasServiceProducts(TrackerCommon):
+
+    def test_has_service_products_values(self):
+        kit_order, component_order = self._create_sale_orders(1, self.kit) | self._create_sale_orders(1, self.component)
+        service_order = self._create_sale_orders(1, self.service)
+        self.assertTrue(kit_order.has_service_products)
+        self.assertTrue(service_order.has_service_products)
+        self.assertFalse(component_order.has_service_products)
+
+    def test_has_service_products_query_count(self):
+        """El cálculo por lote no hace más consultas al crecer el número de órdenes"""
+        products = self.kit | self.component | self.service
+        small = self._create_sale_orders(5, products)
+        large = self._create_sale_orders(50, products)
+        # El índice de servicios por BoM ya existe antes de medir ambos lotes
+        self._warm_up((small | large)._compute_has_service_products)
+
+        small_count = self._count_queries(small._compute_has_service_products)
+        large_count = self._count_queries(large._compute_has_service_products)
+        self.assertEqual(small_count, large_count)
+
+    def test_pos_has_service_products_values(self):
+        kit_order = self._create_pos_orders(1, self.kit)
+        service_order = self._create_pos_orders(1, self.service)
+        plain_order = self._create_pos_orders(1, self.component)
+        mixed_order = self._create_pos_orders(1, self.component | self.service)
+        self.assertTrue(kit_order.has_service_products)
+        self.assertTrue(service_order.has_service_products)
+        self.assertFalse(plain_order.has_service_products)
+        self.assertTrue(mixed_order.has_service_products)
+
+    def test_pos_has_service_products_query_count(self):
+        """El cálculo por lote de órdenes POS no hace más consultas al crecer el lote"""
+        products = self.kit | self.component | self.service
+        small = self._create_pos_orders(5, products)
+        large = self._create_pos_orders(50, products)
+        self._warm_up((small | large)._compute_has_service_products)
+
+        small_count = self._count_queries(small._compute_has_service_products)
+        large_count = self._count_queries(large._compute_has_service_products)
+        self.assertEqual(small_count, large_count)
+        self.assertTrue(all(large.mapped('has_service_products')))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import tagged
+
+from .common import TrackerCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPendingStockMoves(TrackerCommon):
+
+    def _create_projects(self, count):
+        orders = self._create_sale_orders(count, self.kit | self.component)
+        orders.action_confirm()
+        return self.env['tracker.project'].create([{
+            'partner_id': self.partner.id,
+            'analytic_account_id': self.store.id,
+            'sale_order_id': order.id,
+        } for order in orders])
+
+    def test_pending_stock_moves_values(self):
+        project = self._create_projects(1)
+        # Solo el componente comprado queda pendiente; el producto con BoM se excluye
+        self.assertEqual(project.pending_stock_move_count, 1)
+        self.assertEqual(project.pending_stock_move_ids.product_id, self.component)
+
+    def test_pending_stock_moves_query_count(self):
+        """El cálculo para 100 proyectos no hace más consultas que para 10"""
+        small = self._create_projects(10)
+        large = self._create_projects(100)
+        # Primer cálculo fuera de la medición, para comparar ambos lotes en igualdad
+        self._warm_up((small | large)._compute_pending_stock_moves)
+
+        small_count = self._count_queries(small._compute_pending_stock_moves)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(small_count):
+            large._compute_pending_stock_moves()
+        self.assertEqual(set(large.mapped('pending_stock_move_count')), {1})
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Benchmark del cálculo has_service_products de órdenes POS sincronizadas.
+
+Se ejecuta dentro de un shell de Odoo sobre una base de pruebas:
+
+    odoo-bin shell -d <base> --no-http < sm_tracker/tools/benchmark_has_service_products.py
+
+Crea 1,000 órdenes POS en una sola llamada (como una sincronización del
+POS) con líneas de producto con BoM, servicio directo y producto simple, y
+mide consultas SQL y tiempo de la creación y del recálculo en frío del campo.
+Al final revierte la transacción: la base queda como estaba.
+"""
+
+import time
+
+ORDERS = 1000
+
+
+def products(env):
+    Product = env['product.product']
+    service = Product.create({'name': 'BENCH Servicio', 'type': 'service', 'tracker_active': True})
+    component = Product.create({'name': 'BENCH Componente', 'type': 'product'})
+    kit = Product.create({'name': 'BENCH Kit', 'type': 'product'})
+    env['mrp.bom'].create({
+        'product_tmpl_id': kit.product_tmpl_id.id,
+        'type': 'normal',
+        'bom_line_ids': [
+            (0, 0, {'product_id': component.id, 'product_qty': 2}),
+            (0, 0, {'product_id': service.id, 'product_qty': 1}),
+        ],
+    })
+    return [kit, service, component]
+
+
+def pos_session(env):
+    config = env['pos.config'].create({'name': 'BENCH POS'})
+    return env['pos.session'].create({'config_id': config.id, 'user_id': env.uid})
+
+
+def order_vals(session, lines):
+    return {
+        'session_id': session.id,
+        'amount_tax': 0.0,
+        'amount_total': 0.0,
+        'amount_paid': 0.0,
+        'amount_return': 0.0,
+        'lines': [(0, 0, {
+            'product_id': product.id,
+            'qty': 1,
+            'price_unit': 0.0,
+            'price_subtotal': 0.0,
+            'price_subtotal_incl': 0.0,
+        }) for product in lines],
+    }
+
+
+def measure(env, label, func):
+    env.flush_all()
+    env.invalidate_all()
+    queries = env.cr.sql_log_count
+    start = time.perf_counter()
+    result = func()
+    env.flush_all()
+    print('%-45s %6d consultas  %8.3f s' % (label, env.cr.sql_log_count - queries, time.perf_counter() - start))
+    return result
+
+
+def main(env):
+    kit, service, component = products(env)
+    session = pos_session(env)
+    # Mezcla de órdenes: con BoM, servicio directo, producto simple y mixtas
+    mixes = [[kit], [service], [component], [component, service]]
+    vals_list = [order_vals(session, mixes[i % len(mixes)]) for i in range(ORDERS)]
+
+    PosOrder = env['pos.order']
+    orders = measure(env, 'Creación de %d órdenes POS' % ORDERS, lambda: PosOrder.create(vals_list))
+    measure(env, 'Recálculo has_service_products (%d)' % ORDERS, orders._compute_has_service_products)
+    print('Órdenes con servicios: %d de %d' % (len(orders.filtered('has_service_products')), len(orders)))
+    env.cr.rollback()
+    print('\nTransacción revertida')
+
+
+main(env)  # noqa: F821 (env lo define el shell de Odoo)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Benchmark de los índices del tracker (planes de consulta y tiempos).
+
+Se ejecuta dentro de un shell de Odoo sobre una base de pruebas:
+
+    odoo-bin shell -d <base> --no-http < sm_tracker/tools/benchmark_indexes.py
+
+Inserta proyectos, tareas y registros de tiempo sintéticos con SQL, corre
+las búsquedas principales (kanban, listas y reglas por tienda/operario) con
+EXPLAIN ANALYZE con los índices del módulo y sin ellos, y al final revierte
+la transacción: la base queda como estaba.
+"""
+
+import time
+
+from odoo.tools import SQL
+
+PROJECTS = 200000
+TASKS_PER_PROJECT = 1
+TIMESHEETS = 1000000
+OPEN_PROJECT_STATES = ('pending', 'processing', 'pending_delivery')
+
+# Índices creados por el módulo para estos patrones de acceso
+TRACKER_INDEXES = [
+    'tracker_project_store_state_promise_index',
+    'tracker_project__state_index',
+    'tracker_project__promise_date_index',
+    'tracker_task_employee_state_index',
+    'tracker_task_store_state_index',
+    'tracker_task__state_index',
+    'tracker_timesheet_employee_date_index',
+    'tracker_timesheet_store_date_index',
+    'tracker_timesheet__date_index',
+]
+
+
+def _ids(cr, query):
+    cr.execute(query)
+    return [row[0] for row in cr.fetchall()]
+
+
+def seed(env):
+    cr = env.cr
+    partner_ids = _ids(cr, "SELECT id FROM res_partner ORDER BY id LIMIT 1000")
+    store_ids = _ids(cr, "SELECT id FROM account_analytic_account ORDER BY id LIMIT 50")
+    employee_ids = _ids(cr, "SELECT id FROM hr_employee ORDER BY id LIMIT 200")
+    product_ids = _ids(cr, "SELECT id FROM product_product ORDER BY id LIMIT 50")
+    if not (partner_ids and store_ids and employee_ids and product_ids):
+        raise Exception('Se necesita al menos un cliente, una tienda, un empleado y un producto')
+
+    params = {
+        'partners': partner_ids,
+        'stores': store_ids,
+        'employees': employee_ids,
+        'products': product_ids,
+        'projects': PROJECTS,
+        'tasks_per_project': TASKS_PER_PROJECT,
+        'timesheets': TIMESHEETS,
+        'company_id': env.company.id,
+    }
+    start = time.perf_counter()
+    cr.execute("""
+        INSERT INTO tracker_project (name, partner_id, analytic_account_id, state, promise_date, company_id,
+                                     create_date, write_date)
+        SELECT 'BENCH/' || g,
+               (%(partners)s::int[])[1 + floor(random() * array_length(%(partners)s::int[], 1))::int],
+               (%(stores)s::int[])[1 + floor(random() * array_length(%(stores)s::int[], 1))::int],
+               (ARRAY['pending', 'processing', 'pending_delivery', 'delivered', 'delivered', 'delivered', 'cancel'])
+                   [1 + floor(random() * 7)::int],
+               now() - interval '365 days' + random() * interval '400 days',
+               %(company_id)s,
+               now(), now()
+          FROM generate_series(1, %(projects)s) g
+    """, params)
+    cr.execute("""
+        INSERT INTO tracker_task (name, project_id, product_id, employee_id, analytic_account_id, state,
+                                  company_id, create_date, write_date)
+        SELECT 'BENCH', p.id,
+               (%(products)s::int[])[1 + floor(random() * array_length(%(products)s::int[], 1))::int],
+               (%(employees)s::int[])[1 + floor(random() * array_length(%(employees)s::int[], 1))::int],
+               p.analytic_account_id,
+               CASE WHEN p.state IN ('delivered', 'pending_delivery') THEN 'done'
+                    WHEN p.state = 'cancel' THEN 'cancel'
+                    ELSE (ARRAY['pending', 'ready', 'in_progress', 'paused'])[1 + floor(random() * 4)::int] END,
+               p.company_id, now(), now()
+          FROM tracker_project p, generate_series(1, %(tasks_per_project)s)
+         WHERE p.name LIKE 'BENCH/%%'
+    """, params)
+    cr.execute("""
+        INSERT INTO tracker_timesheet (name, task_id, employee_id, analytic_account_id, date, start_time, end_time,
+                                       state, company_id, create_date, write_date)
+        SELECT 'BENCH', t.id, t.employee_id, t.analytic_account_id, s.start_time::date, s.start_time,
+               s.start_time + random() * interval '3 hours', 'stopped', t.company_id, now(), now()
+          FROM (
+                SELECT (SELECT min(id) FROM tracker_task WHERE name = 'BENCH')
+                       + floor(random() * %(projects)s * %(tasks_per_project)s)::int AS task_id,
+                       now() - random() * interval '365 days' AS start_time
+                  FROM generate_series(1, %(timesheets)s)
+               ) s
+          JOIN tracker_task t ON t.id = s.task_id
+    """, params)
+    cr.execute("ANALYZE tracker_project")
+    cr.execute("ANALYZE tracker_task")
+    cr.execute("ANALYZE tracker_timesheet")
+    print('Datos sintéticos insertados en %.1f s' % (time.perf_counter() - start))
+    return params
+
+
+def scenarios(params):
+    store_id = params['stores'][0]
+    employee_id = params['employees'][0]
+    return [
+        ('Kanban de proyectos por tienda', 'tracker.project',
+         [('analytic_account_id', '=', store_id), ('state', 'in', OPEN_PROJECT_STATES)], 'promise_date', 80),
+        ('Lista de proyectos abiertos', 'tracker.project',
+         [('state', 'in', OPEN_PROJECT_STATES)], 'promise_date desc, id desc', 80),
+        ('Tareas del operario (regla por operario)', 'tracker.task',
+         [('employee_id', '=', employee_id), ('state', 'in', ['pending', 'ready', 'in_progress', 'paused'])], 'id', 80),
+        ('Tareas abiertas de la tienda (regla por tienda)', 'tracker.task',
+         [('analytic_account_id', 'in', params['stores'][:3]), ('state', 'not in', ['done', 'cancel'])], 'id', 80),
+        ('Horas del empleado en el mes', 'tracker.timesheet',
+         [('employee_id', '=', employee_id), ('date', '>=', _month_start())], 'date desc, id desc', 80),
+        ('Horas de la tienda en el mes', 'tracker.timesheet',
+         [('analytic_account_id', '=', store_id), ('date', '>=', _month_start())], 'date desc, id desc', 80),
+    ]
+
+
+def _month_start():
+    from datetime import date
+    return date.today().replace(day=1)
+
+
+def run_scenarios(env, params, label):
+    print('\n===== %s =====' % label)
+    for name, model, domain, order, limit in scenarios(params):
+        query = env[model].sudo()._search(domain, order=order, limit=limit)
+        env.cr.execute(SQL("EXPLAIN (ANALYZE, BUFFERS) %s", query.select()))
+        plan = [row[0] for row in env.cr.fetchall()]
+        print('\n--- %s (%s)' % (name, model))
+        print('\n'.join(plan))
+
+
+def main(env):
+    params = seed(env)
+    run_scenarios(env, params, 'Con índices del tracker')
+    for index in TRACKER_INDEXES:
+        env.cr.execute(SQL("DROP INDEX IF EXISTS %s", SQL.identifier(index)))
+    run_scenarios(env, params, 'Sin índices del tracker')
+    env.cr.rollback()
+    print('\nTransacción revertida')
+
+
+main(env)  # noqa: F821 (env lo define el shell de Odoo)